@@ -1,9 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from calendar import monthrange
 from typing import List, Optional
 from datetime import datetime, date
-from ..db.database import get_db
-from ..models.calendar import DaySettings
+from ..db.database import get_async_db
+from ..models.calendar import DaySettings, AvailabilityRule
+from ..services.plan_store import replan_window
+from ..services.availability import load_calendar
+from ..services.time_slots import SlotIndex, slot_error
+from ..services.calendar_import import CalendarImporter, ImportErrors, iter_lines, iter_csv_rows, iter_ical_rows
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -20,20 +27,57 @@ class DaySettingsCreate(BaseModel):
     notes: Optional[str] = None
 
 class DaySettingsResponse(BaseModel):
-    id: int
+    id: Optional[int]  # Absent pour un jour issu d'une règle récurrente
     date: date
     available: bool
     time_slots: List[TimeSlot]
     is_remote_work: bool
     notes: Optional[str]
+    rule_id: Optional[int] = None
+
+class AvailabilityRuleCreate(BaseModel):
+    weekdays: List[int]  # 0 = lundi ... 6 = dimanche
+    interval_weeks: int = 1
+    start_date: date
+    end_date: Optional[date] = None
+    available: bool = True
+    time_slots: List[TimeSlot]
+    is_remote_work: bool = False
+    notes: Optional[str] = None
+
+class AvailabilityRuleResponse(AvailabilityRuleCreate):
+    id: int
 
 class WeeklySettings(BaseModel):
     start_date: date
     end_date: date
     settings: List[DaySettingsCreate]
 
+class MonthlySettings(BaseModel):
+    start_month: date  # Seuls l'année et le mois sont pris en compte
+    end_month: date
+    settings: List[DaySettingsCreate]
+
+# Taille des blocs lus dans un fichier importé
+IMPORT_CHUNK_SIZE = 64 * 1024
+
+# Jours écrits par instruction INSERT (7 paramètres par jour, limite PostgreSQL de 32767)
+UPSERT_CHUNK_SIZE = 1000
+
+async def _get_day(db: AsyncSession, day: date) -> Optional[DaySettings]:
+    result = await db.execute(select(DaySettings).where(DaySettings.date == day))
+    return result.scalars().first()
+
+async def _replan_days(db: AsyncSession, start: date, end: date):
+    """Recalculer les seules séances du plan enregistré touchées par la modification"""
+    await replan_window(
+        db,
+        datetime.combine(start, datetime.min.time()),
+        datetime.combine(end, datetime.min.time())
+    )
+
 @router.post('/days', response_model=DaySettingsResponse)
-async def create_day_settings(settings: DaySettingsCreate, db: Session = Depends(get_db)):
+async def create_day_settings(settings: DaySettingsCreate, db: AsyncSession = Depends(get_async_db)):
     db_settings = DaySettings(
         date=settings.date,
         available=settings.available,
@@ -43,7 +87,7 @@ async def create_day_settings(settings: DaySettingsCreate, db: Session = Depends
     )
     
     # Vérifier si les paramètres existent déjà pour cette date
-    existing = db.query(DaySettings).filter(DaySettings.date == settings.date).first()
+    existing = await _get_day(db, settings.date)
     if existing:
         raise HTTPException(
             status_code=400,
@@ -51,13 +95,14 @@ async def create_day_settings(settings: DaySettingsCreate, db: Session = Depends
         )
     
     db.add(db_settings)
-    db.commit()
-    db.refresh(db_settings)
+    await db.commit()
+    await db.refresh(db_settings)
+    await _replan_days(db, settings.date, settings.date)
     return db_settings
 
 @router.get('/days/{date}', response_model=DaySettingsResponse)
-async def get_day_settings(date: date, db: Session = Depends(get_db)):
-    settings = db.query(DaySettings).filter(DaySettings.date == date).first()
+async def get_day_settings(date: date, db: AsyncSession = Depends(get_async_db)):
+    settings = await _get_day(db, date)
     if not settings:
         raise HTTPException(status_code=404, detail="Paramètres non trouvés")
     return settings
@@ -66,9 +111,9 @@ async def get_day_settings(date: date, db: Session = Depends(get_db)):
 async def update_day_settings(
     date: date,
     settings_update: DaySettingsCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_settings = db.query(DaySettings).filter(DaySettings.date == date).first()
+    db_settings = await _get_day(db, date)
     if not db_settings:
         raise HTTPException(status_code=404, detail="Paramètres non trouvés")
     
@@ -77,65 +122,228 @@ async def update_day_settings(
     db_settings.is_remote_work = settings_update.is_remote_work
     db_settings.notes = settings_update.notes
     
-    db.commit()
-    db.refresh(db_settings)
+    await db.commit()
+    await db.refresh(db_settings)
+    await _replan_days(db, date, date)
     return db_settings
 
 @router.delete('/days/{date}')
-async def delete_day_settings(date: date, db: Session = Depends(get_db)):
-    db_settings = db.query(DaySettings).filter(DaySettings.date == date).first()
+async def delete_day_settings(date: date, db: AsyncSession = Depends(get_async_db)):
+    db_settings = await _get_day(db, date)
     if not db_settings:
         raise HTTPException(status_code=404, detail="Paramètres non trouvés")
     
-    db.delete(db_settings)
-    db.commit()
+    await db.delete(db_settings)
+    await db.commit()
+    await _replan_days(db, date, date)
     return {"message": "Paramètres supprimés"}
 
+def _validate_day(day_settings: DaySettingsCreate, start_date: date, end_date: date) -> Optional[str]:
+    """Erreur de validation d'un jour, ou None"""
+    if not start_date <= day_settings.date <= end_date:
+        return f"Date hors de la période {start_date} - {end_date}"
+    for slot in day_settings.time_slots:
+        error = slot_error(slot.start, slot.end)
+        if error:
+            return error
+    return None
+
+async def _upsert_days(db: AsyncSession, days: List[DaySettingsCreate], start_date: date, end_date: date) -> List[DaySettings]:
+    """Écrire tous les jours en une transaction : tout ou rien.
+
+    Les erreurs de validation de tous les jours sont renvoyées ensemble
+    (422) avant toute écriture ; chaque paquet de jours est ensuite écrit
+    par un seul INSERT ... ON CONFLICT (date) DO UPDATE ... RETURNING.
+    """
+    errors = []
+    seen = set()
+    for day_settings in days:
+        error = _validate_day(day_settings, start_date, end_date)
+        if error is None and day_settings.date in seen:
+            error = "Date présente plusieurs fois"
+        seen.add(day_settings.date)
+        if error:
+            errors.append({'date': str(day_settings.date), 'error': error})
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            'date': datetime.combine(day_settings.date, datetime.min.time()),
+            'available': day_settings.available,
+            'time_slots': [slot.dict() for slot in day_settings.time_slots],
+            'is_remote_work': day_settings.is_remote_work,
+            'notes': day_settings.notes,
+            'created_at': now,
+            'updated_at': now
+        }
+        for day_settings in days
+    ]
+
+    saved = []
+    try:
+        for offset in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            statement = insert(DaySettings).values(rows[offset:offset + UPSERT_CHUNK_SIZE])
+            statement = statement.on_conflict_do_update(
+                index_elements=['date'],
+                set_={
+                    'available': statement.excluded.available,
+                    'time_slots': statement.excluded.time_slots,
+                    'is_remote_work': statement.excluded.is_remote_work,
+                    'notes': statement.excluded.notes,
+                    'updated_at': statement.excluded.updated_at
+                }
+            ).returning(DaySettings)
+            result = await db.execute(statement, execution_options={'populate_existing': True})
+            saved.extend(result.scalars().all())
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=f"Erreur lors de l'enregistrement du calendrier : {str(e)}")
+
+    if days:
+        dates = [day_settings.date for day_settings in days]
+        await _replan_days(db, min(dates), max(dates))
+    return sorted(saved, key=lambda day: day.date)
+
 @router.post('/weeks', response_model=List[DaySettingsResponse])
-async def set_weekly_settings(settings: WeeklySettings, db: Session = Depends(get_db)):
+async def set_weekly_settings(settings: WeeklySettings, db: AsyncSession = Depends(get_async_db)):
     """Définir les paramètres pour une semaine entière"""
-    responses = []
-    for day_settings in settings.settings:
-        try:
-            db_settings = DaySettings(
-                date=day_settings.date,
-                available=day_settings.available,
-                time_slots=[slot.dict() for slot in day_settings.time_slots],
-                is_remote_work=day_settings.is_remote_work,
-                notes=day_settings.notes
-            )
-            
-            existing = db.query(DaySettings).filter(DaySettings.date == day_settings.date).first()
-            if existing:
-                # Mettre à jour les paramètres existants
-                for key, value in day_settings.dict().items():
-                    if key == 'time_slots':
-                        existing.time_slots = [slot.dict() for slot in value]
-                    else:
-                        setattr(existing, key, value)
-                db_settings = existing
-            else:
-                db.add(db_settings)
-            
-            db.commit()
-            db.refresh(db_settings)
-            responses.append(db_settings)
-            
-        except Exception as e:
-            db.rollback()
-            raise HTTPException(
-                status_code=400,
-                detail=f"Erreur lors de la configuration du {day_settings.date}: {str(e)}"
-            )
-    
-    return responses
+    return await _upsert_days(db, settings.settings, settings.start_date, settings.end_date)
+
+@router.post('/months', response_model=List[DaySettingsResponse])
+async def set_monthly_settings(settings: MonthlySettings, db: AsyncSession = Depends(get_async_db)):
+    """Définir les paramètres de plusieurs mois entiers"""
+    start_date = settings.start_month.replace(day=1)
+    last_month = settings.end_month
+    end_date = date(last_month.year, last_month.month, monthrange(last_month.year, last_month.month)[1])
+    return await _upsert_days(db, settings.settings, start_date, end_date)
+
+async def _read_chunks(file: UploadFile):
+    while True:
+        chunk = await file.read(IMPORT_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+@router.post('/import')
+async def import_calendar(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Importer un calendrier de disponibilités (CSV ou iCalendar), tout ou rien"""
+    if format is None:
+        format = 'ical' if (file.filename or '').lower().endswith(('.ics', '.ical')) else 'csv'
+    if format not in ('csv', 'ical'):
+        raise HTTPException(status_code=400, detail="Format attendu : csv ou ical")
+
+    errors = ImportErrors()
+    lines = iter_lines(_read_chunks(file))
+    rows = iter_csv_rows(lines, errors) if format == 'csv' else iter_ical_rows(lines, errors)
+
+    try:
+        stats = await CalendarImporter(db).load(rows)
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=f"Erreur lors de l'import : {str(e)}")
+
+    if errors.count:
+        await db.rollback()
+        raise HTTPException(status_code=422, detail={'error_count': errors.count, 'errors': errors.items})
+    await db.commit()
+
+    if stats['days']:
+        await _replan_days(db, stats['start_date'].date(), stats['end_date'].date())
+    return stats
 
 @router.get('/weeks/{start_date}/{end_date}', response_model=List[DaySettingsResponse])
-async def get_weekly_settings(start_date: date, end_date: date, db: Session = Depends(get_db)):
-    """Récupérer les paramètres pour une période donnée"""
-    settings = db.query(DaySettings).filter(
-        DaySettings.date >= start_date,
-        DaySettings.date <= end_date
-    ).all()
-    
-    return settings
+async def get_weekly_settings(start_date: date, end_date: date, db: AsyncSession = Depends(get_async_db)):
+    """Récupérer les paramètres pour une période donnée, règles récurrentes comprises"""
+    days = await db.run_sync(lambda session: load_calendar(session, start_date, end_date))
+    return [day._asdict() for day in days]
+
+@router.get('/free-days/{start_date}/{end_date}', response_model=List[date])
+async def get_free_days(start_date: date, end_date: date, min_minutes: int, db: AsyncSession = Depends(get_async_db)):
+    """Jours disponibles de la période ayant un créneau libre d'au moins `min_minutes`"""
+    days = await db.run_sync(lambda session: load_calendar(session, start_date, end_date))
+    return SlotIndex(days).days_with_at_least(start_date, end_date, min_minutes)
+
+def _validate_rule(rule: AvailabilityRuleCreate):
+    errors = []
+    if not rule.weekdays or any(weekday not in range(7) for weekday in rule.weekdays):
+        errors.append("weekdays doit contenir des jours entre 0 (lundi) et 6 (dimanche)")
+    if rule.interval_weeks < 1:
+        errors.append("interval_weeks doit être au moins 1")
+    if rule.end_date is not None and rule.end_date < rule.start_date:
+        errors.append("end_date est antérieure à start_date")
+    for slot in rule.time_slots:
+        error = slot_error(slot.start, slot.end)
+        if error:
+            errors.append(error)
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+
+def _apply_rule(db_rule: AvailabilityRule, rule: AvailabilityRuleCreate):
+    db_rule.weekdays = sorted(set(rule.weekdays))
+    db_rule.interval_weeks = rule.interval_weeks
+    db_rule.start_date = datetime.combine(rule.start_date, datetime.min.time())
+    db_rule.end_date = datetime.combine(rule.end_date, datetime.min.time()) if rule.end_date else None
+    db_rule.available = rule.available
+    db_rule.time_slots = [slot.dict() for slot in rule.time_slots]
+    db_rule.is_remote_work = rule.is_remote_work
+    db_rule.notes = rule.notes
+
+async def _replan_rule(db: AsyncSession, start: datetime, end: Optional[datetime]):
+    """Recalculer le plan sur la période couverte par la règle (jusqu'à la fin du plan si sans fin)"""
+    await replan_window(db, start, end)
+
+@router.post('/rules', response_model=AvailabilityRuleResponse)
+async def create_availability_rule(rule: AvailabilityRuleCreate, db: AsyncSession = Depends(get_async_db)):
+    _validate_rule(rule)
+    db_rule = AvailabilityRule()
+    _apply_rule(db_rule, rule)
+    db.add(db_rule)
+    await db.commit()
+    await db.refresh(db_rule)
+    await _replan_rule(db, db_rule.start_date, db_rule.end_date)
+    return db_rule
+
+@router.get('/rules', response_model=List[AvailabilityRuleResponse])
+async def list_availability_rules(db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(select(AvailabilityRule).order_by(AvailabilityRule.id))
+    return result.scalars().all()
+
+@router.put('/rules/{rule_id}', response_model=AvailabilityRuleResponse)
+async def update_availability_rule(
+    rule_id: int,
+    rule_update: AvailabilityRuleCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    db_rule = await db.get(AvailabilityRule, rule_id)
+    if not db_rule:
+        raise HTTPException(status_code=404, detail="Règle non trouvée")
+    _validate_rule(rule_update)
+
+    previous = (db_rule.start_date, db_rule.end_date)
+    _apply_rule(db_rule, rule_update)
+    await db.commit()
+    await db.refresh(db_rule)
+
+    # Ancienne et nouvelle période de la règle
+    end = None if previous[1] is None or db_rule.end_date is None else max(previous[1], db_rule.end_date)
+    await _replan_rule(db, min(previous[0], db_rule.start_date), end)
+    return db_rule
+
+@router.delete('/rules/{rule_id}')
+async def delete_availability_rule(rule_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_rule = await db.get(AvailabilityRule, rule_id)
+    if not db_rule:
+        raise HTTPException(status_code=404, detail="Règle non trouvée")
+
+    start, end = db_rule.start_date, db_rule.end_date
+    await db.delete(db_rule)
+    await db.commit()
+    await _replan_rule(db, start, end)
+    return {"message": "Règle supprimée"}
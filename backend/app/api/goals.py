@@ -1,11 +1,15 @@
 from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
-from ..db.database import get_db
+from ..db.database import get_async_db
 from ..models.goals import Race, PowerGoal
 from ..services.metrics_analyzer import MetricsAnalyzer
-from ..services.intervals_client import IntervalsClient
+from ..services.intervals_client import AsyncIntervalsClient, get_intervals_client
+from ..services.fitness_history import FitnessHistoryMirror, get_fitness_history_mirror
+from ..services.plan_store import PlanStore, race_change_window, replan_window
+from ..services.compute_executor import ComputeQueueFull, get_compute_executor
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -25,8 +29,8 @@ class RaceResponse(BaseModel):
     distance: float
     elevation: float
     priority: str
-    description: Optional[str]
-    preparation_analysis: Optional[dict]
+    description: Optional[str] = None  # Pas de colonne correspondante sur Race
+    preparation_analysis: Optional[dict] = None
 
 class PowerGoalCreate(BaseModel):
     target_ftp: float
@@ -40,30 +44,79 @@ class PowerGoalResponse(BaseModel):
     description: Optional[str]
     progress_analysis: Optional[dict]
 
+async def _replan_races(db: AsyncSession, *race_dates: datetime):
+    """Recalculer la fenêtre d'affinage et de préparation spécifique autour des courses modifiées"""
+    window = race_change_window(*race_dates)
+    if window:
+        await replan_window(db, *window)
+
+async def _invalidate_plan(db: AsyncSession):
+    await db.run_sync(lambda session: PlanStore(session).invalidate())
+
 # Routes pour les objectifs de course
 @router.post('/races', response_model=RaceResponse)
 async def create_race(
     race: RaceCreate,
-    db: Session = Depends(get_db),
-    intervals_client: IntervalsClient = Depends(get_intervals_client)
+    db: AsyncSession = Depends(get_async_db),
+    intervals_client: AsyncIntervalsClient = Depends(get_intervals_client),
+    fitness_history: FitnessHistoryMirror = Depends(get_fitness_history_mirror)
 ):
     db_race = Race(**race.dict())
     db.add(db_race)
-    db.commit()
-    db.refresh(db_race)
+    await db.commit()
+    await db.refresh(db_race)
+    await _replan_races(db, db_race.date)
     
-    analyzer = MetricsAnalyzer(intervals_client)
+    analyzer = MetricsAnalyzer(intervals_client, fitness_history)
     metrics = await analyzer.get_training_metrics()
-    analysis = analyzer.analyze_race_preparation(db_race, metrics['current_metrics'])
+    try:
+        analysis = await get_compute_executor().run_thread(
+            analyzer.analyze_race_preparation, db_race, metrics['current_metrics']
+        )
+    except ComputeQueueFull:
+        # La course est enregistrée : l'analyse pourra être obtenue plus tard
+        analysis = None
     
     return {
         **db_race.__dict__,
         'preparation_analysis': analysis
     }
 
+@router.get('/races', response_model=List[RaceResponse])
+async def list_races(
+    upcoming: bool = True,
+    db: AsyncSession = Depends(get_async_db),
+    intervals_client: AsyncIntervalsClient = Depends(get_intervals_client),
+    fitness_history: FitnessHistoryMirror = Depends(get_fitness_history_mirror)
+):
+    """Courses de l'athlète avec leur analyse de préparation (métriques récupérées une seule fois)"""
+    query = select(Race)
+    if upcoming:
+        query = query.where(Race.date >= datetime.now())
+    races = (await db.execute(query.order_by(Race.date))).scalars().all()
+    if not races:
+        return []
+
+    analyzer = MetricsAnalyzer(intervals_client, fitness_history)
+    metrics = await analyzer.get_training_metrics()
+    try:
+        analyses = await get_compute_executor().run_thread(
+            analyzer.analyze_races_preparation, races, metrics['current_metrics']
+        )
+    except ComputeQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return [
+        {
+            **race.__dict__,
+            'preparation_analysis': analysis
+        }
+        for race, analysis in zip(races, analyses)
+    ]
+
 @router.get('/races/{race_id}', response_model=RaceResponse)
-async def get_race(race_id: int, db: Session = Depends(get_db)):
-    race = db.query(Race).filter(Race.id == race_id).first()
+async def get_race(race_id: int, db: AsyncSession = Depends(get_async_db)):
+    race = await db.get(Race, race_id)
     if not race:
         raise HTTPException(status_code=404, detail="Course non trouvée")
     return race
@@ -72,42 +125,48 @@ async def get_race(race_id: int, db: Session = Depends(get_db)):
 async def update_race(
     race_id: int,
     race_update: RaceCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_race = db.query(Race).filter(Race.id == race_id).first()
+    db_race = await db.get(Race, race_id)
     if not db_race:
         raise HTTPException(status_code=404, detail="Course non trouvée")
     
+    previous_date = db_race.date
     for key, value in race_update.dict().items():
         setattr(db_race, key, value)
     
-    db.commit()
-    db.refresh(db_race)
+    await db.commit()
+    await db.refresh(db_race)
+    await _replan_races(db, previous_date, db_race.date)
     return db_race
 
 @router.delete('/races/{race_id}')
-async def delete_race(race_id: int, db: Session = Depends(get_db)):
-    db_race = db.query(Race).filter(Race.id == race_id).first()
+async def delete_race(race_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_race = await db.get(Race, race_id)
     if not db_race:
         raise HTTPException(status_code=404, detail="Course non trouvée")
     
-    db.delete(db_race)
-    db.commit()
+    race_date = db_race.date
+    await db.delete(db_race)
+    await db.commit()
+    await _replan_races(db, race_date)
     return {"message": "Course supprimée"}
 
 # Routes pour les objectifs de puissance
 @router.post('/power', response_model=PowerGoalResponse)
 async def create_power_goal(
     goal: PowerGoalCreate,
-    db: Session = Depends(get_db),
-    intervals_client: IntervalsClient = Depends(get_intervals_client)
+    db: AsyncSession = Depends(get_async_db),
+    intervals_client: AsyncIntervalsClient = Depends(get_intervals_client),
+    fitness_history: FitnessHistoryMirror = Depends(get_fitness_history_mirror)
 ):
     db_goal = PowerGoal(**goal.dict())
     db.add(db_goal)
-    db.commit()
-    db.refresh(db_goal)
+    await db.commit()
+    await db.refresh(db_goal)
+    await _invalidate_plan(db)
     
-    analyzer = MetricsAnalyzer(intervals_client)
+    analyzer = MetricsAnalyzer(intervals_client, fitness_history)
     metrics = await analyzer.get_training_metrics()
     progress = analyzer.analyze_power_progress(db_goal, metrics['current_metrics'])
     
@@ -119,14 +178,15 @@ async def create_power_goal(
 @router.get('/power/{goal_id}', response_model=PowerGoalResponse)
 async def get_power_goal(
     goal_id: int,
-    db: Session = Depends(get_db),
-    intervals_client: IntervalsClient = Depends(get_intervals_client)
+    db: AsyncSession = Depends(get_async_db),
+    intervals_client: AsyncIntervalsClient = Depends(get_intervals_client),
+    fitness_history: FitnessHistoryMirror = Depends(get_fitness_history_mirror)
 ):
-    goal = db.query(PowerGoal).filter(PowerGoal.id == goal_id).first()
+    goal = await db.get(PowerGoal, goal_id)
     if not goal:
         raise HTTPException(status_code=404, detail="Objectif non trouvé")
     
-    analyzer = MetricsAnalyzer(intervals_client)
+    analyzer = MetricsAnalyzer(intervals_client, fitness_history)
     metrics = await analyzer.get_training_metrics()
     progress = analyzer.analyze_power_progress(goal, metrics['current_metrics'])
     
@@ -139,25 +199,27 @@ async def get_power_goal(
 async def update_power_goal(
     goal_id: int,
     goal_update: PowerGoalCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_goal = db.query(PowerGoal).filter(PowerGoal.id == goal_id).first()
+    db_goal = await db.get(PowerGoal, goal_id)
     if not db_goal:
         raise HTTPException(status_code=404, detail="Objectif non trouvé")
     
     for key, value in goal_update.dict().items():
         setattr(db_goal, key, value)
     
-    db.commit()
-    db.refresh(db_goal)
+    await db.commit()
+    await db.refresh(db_goal)
+    await _invalidate_plan(db)
     return db_goal
 
 @router.delete('/power/{goal_id}')
-async def delete_power_goal(goal_id: int, db: Session = Depends(get_db)):
-    db_goal = db.query(PowerGoal).filter(PowerGoal.id == goal_id).first()
+async def delete_power_goal(goal_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_goal = await db.get(PowerGoal, goal_id)
     if not db_goal:
         raise HTTPException(status_code=404, detail="Objectif non trouvé")
     
-    db.delete(db_goal)
-    db.commit()
+    await db.delete(db_goal)
+    await db.commit()
+    await _invalidate_plan(db)
     return {"message": "Objectif supprimé"}
@@ -0,0 +1,91 @@
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from pydantic import BaseModel
+
+from ..db.database import get_async_db
+from ..services.plan_store import PlanStore, regenerate_plan
+from ..services.training_planner import TrainingPlanner
+from ..services.metrics_analyzer import MetricsAnalyzer
+from ..services.intervals_client import AsyncIntervalsClient, get_intervals_client
+from ..services.fitness_history import FitnessHistoryMirror, get_fitness_history_mirror
+from ..services.compute_executor import ComputeQueueFull
+
+router = APIRouter()
+
+class PlanRequest(BaseModel):
+    start_date: datetime
+    end_date: datetime
+
+@router.get('/current')
+async def get_current_plan(
+    db: AsyncSession = Depends(get_async_db),
+    intervals_client: AsyncIntervalsClient = Depends(get_intervals_client),
+    fitness_history: FitnessHistoryMirror = Depends(get_fitness_history_mirror)
+):
+    """Plan enregistré ; régénéré sur la même période si ses entrées ont changé"""
+    plan = await db.run_sync(lambda session: PlanStore(session).read_plan(intervals_client.athlete_id))
+    if plan is not None:
+        return plan
+
+    stored = await db.run_sync(lambda session: PlanStore(session).get_plan(intervals_client.athlete_id))
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Aucun plan enregistré")
+
+    try:
+        return await regenerate_plan(
+            db,
+            TrainingPlanner(intervals_client, fitness_history),
+            intervals_client.athlete_id,
+            stored.start_date,
+            stored.end_date
+        )
+    except ComputeQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get('/current/projection')
+async def get_current_plan_projection(
+    db: AsyncSession = Depends(get_async_db),
+    intervals_client: AsyncIntervalsClient = Depends(get_intervals_client),
+    fitness_history: FitnessHistoryMirror = Depends(get_fitness_history_mirror)
+):
+    """Évolution prévue de CTL/ATL/TSB si le plan enregistré est suivi"""
+    def load(session):
+        store = PlanStore(session)
+        plan = store.get_plan(intervals_client.athlete_id)
+        return plan, (store.get_workouts(plan) if plan is not None else [])
+
+    plan, workouts = await db.run_sync(load)
+    if plan is None:
+        raise HTTPException(status_code=404, detail="Aucun plan enregistré")
+
+    analyzer = MetricsAnalyzer(intervals_client, fitness_history)
+    try:
+        return await analyzer.project_training_load(workouts, plan.ftp, plan.end_date)
+    except ComputeQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post('/generate')
+async def generate_plan(
+    plan_request: PlanRequest,
+    db: AsyncSession = Depends(get_async_db),
+    intervals_client: AsyncIntervalsClient = Depends(get_intervals_client),
+    fitness_history: FitnessHistoryMirror = Depends(get_fitness_history_mirror)
+):
+    """Générer et enregistrer un plan sans le synchroniser"""
+    try:
+        return await regenerate_plan(
+            db,
+            TrainingPlanner(intervals_client, fitness_history),
+            intervals_client.athlete_id,
+            plan_request.start_date,
+            plan_request.end_date
+        )
+    except ComputeQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
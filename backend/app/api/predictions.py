@@ -3,12 +3,15 @@ from pydantic import BaseModel
 from datetime import datetime
 from typing import List, Optional
 from ..services.performance_predictor import PerformancePredictor
-from ..services.intervals_client import IntervalsClient
+from ..services.intervals_client import AsyncIntervalsClient, get_intervals_client
+from ..services.fitness_history import FitnessHistoryMirror, get_fitness_history_mirror
+from ..services.compute_executor import ComputeQueueFull
 
 router = APIRouter()
 
 class PredictionRequest(BaseModel):
     days_ahead: int = 30
+    horizons: Optional[List[int]] = None  # Plusieurs horizons en un seul ajustement
 
 class RaceReadinessRequest(BaseModel):
     race_date: datetime
@@ -18,27 +21,52 @@ class RaceReadinessRequest(BaseModel):
 @router.post('/performance')
 async def predict_performance(
     request: PredictionRequest,
-    intervals_client: IntervalsClient = Depends(get_intervals_client)
+    intervals_client: AsyncIntervalsClient = Depends(get_intervals_client),
+    fitness_history: FitnessHistoryMirror = Depends(get_fitness_history_mirror)
 ):
-    predictor = PerformancePredictor(intervals_client)
+    predictor = PerformancePredictor(intervals_client, fitness_history)
     try:
-        prediction = predictor.predict_performance(request.days_ahead)
+        if request.horizons:
+            return await predictor.predict_horizons(request.horizons)
+        prediction = await predictor.predict_performance(request.days_ahead)
         return prediction
+    except ComputeQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post('/race-readiness')
 async def analyze_race_readiness(
     request: RaceReadinessRequest,
-    intervals_client: IntervalsClient = Depends(get_intervals_client)
+    intervals_client: AsyncIntervalsClient = Depends(get_intervals_client),
+    fitness_history: FitnessHistoryMirror = Depends(get_fitness_history_mirror)
 ):
-    predictor = PerformancePredictor(intervals_client)
+    predictor = PerformancePredictor(intervals_client, fitness_history)
     try:
-        analysis = predictor.analyze_race_readiness(
+        analysis = await predictor.analyze_race_readiness(
             race_date=request.race_date,
             target_ftp=request.target_ftp,
             required_ctl=request.required_ctl
         )
         return analysis
+    except ComputeQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post('/race-readiness/batch')
+async def analyze_races_readiness(
+    requests: List[RaceReadinessRequest],
+    intervals_client: AsyncIntervalsClient = Depends(get_intervals_client),
+    fitness_history: FitnessHistoryMirror = Depends(get_fitness_history_mirror)
+):
+    predictor = PerformancePredictor(intervals_client, fitness_history)
+    try:
+        return await predictor.analyze_races_readiness([
+            (request.race_date, request.target_ftp, request.required_ctl)
+            for request in requests
+        ])
+    except ComputeQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,14 +1,20 @@
+import json
 from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime, date
 from pydantic import BaseModel
 
-from ..db.database import get_db
+from ..db.database import get_async_db
 from ..services.sync_service import SyncService
-from ..services.intervals_client import IntervalsClient
-from ..models.goals import Race, PowerGoal
-from ..models.calendar import DaySettings
+from ..services.plan_store import load_plan_inputs
+from ..services.training_planner import TrainingPlanner
+from ..services.sync_jobs import get_sync_job_queue
+from ..services.intervals_client import AsyncIntervalsClient, get_intervals_client, get_rate_limiter
+from ..services.fitness_history import FitnessHistoryMirror, get_fitness_history_mirror
+from ..models.sync import SyncJob
 
 router = APIRouter()
 
@@ -22,38 +28,30 @@ class SyncResponse(BaseModel):
     failed: int
     synced_workouts: List[dict]
     failed_workouts: List[dict]
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+
+class SyncStatusRequest(BaseModel):
+    start_date: datetime
+    end_date: datetime
 
 @router.post('/sync-workouts', response_model=SyncResponse)
 async def sync_workouts(
     sync_request: SyncRequest,
-    db: Session = Depends(get_db),
-    intervals_client: IntervalsClient = Depends(get_intervals_client)
+    db: AsyncSession = Depends(get_async_db),
+    intervals_client: AsyncIntervalsClient = Depends(get_intervals_client),
+    fitness_history: FitnessHistoryMirror = Depends(get_fitness_history_mirror)
 ):
-    # Récupérer les objectifs et le calendrier
-    races = db.query(Race).filter(
-        Race.date >= sync_request.start_date,
-        Race.date <= sync_request.end_date
-    ).all()
-
-    power_goals = db.query(PowerGoal).filter(
-        PowerGoal.target_date >= sync_request.start_date,
-        PowerGoal.target_date <= sync_request.end_date
-    ).all()
-
-    calendar = db.query(DaySettings).filter(
-        DaySettings.date >= sync_request.start_date.date(),
-        DaySettings.date <= sync_request.end_date.date()
-    ).all()
-
     # Initialiser le service de synchronisation
-    sync_service = SyncService(intervals_client)
+    sync_service = SyncService(intervals_client, fitness_history, db)
 
     # Synchroniser les workouts
     try:
+        inputs = await db.run_sync(lambda session: load_plan_inputs(session, sync_request.start_date, sync_request.end_date))
         result = await sync_service.sync_workouts(
-            races=races,
-            power_goals=power_goals,
-            calendar=calendar,
+            **inputs,
             start_date=sync_request.start_date,
             end_date=sync_request.end_date,
             prompt=sync_request.prompt
@@ -62,12 +60,100 @@ async def sync_workouts(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post('/training-plan/stream')
+async def stream_training_plan(
+    sync_request: SyncRequest,
+    db: AsyncSession = Depends(get_async_db),
+    intervals_client: AsyncIntervalsClient = Depends(get_intervals_client),
+    fitness_history: FitnessHistoryMirror = Depends(get_fitness_history_mirror)
+):
+    """Diffuser le plan d'entraînement en NDJSON, une séance par ligne, à mesure qu'il est généré"""
+    planner = TrainingPlanner(intervals_client, fitness_history)
+    # Tout ce qui touche la base est chargé avant le début de la diffusion
+    inputs = await db.run_sync(lambda session: load_plan_inputs(session, sync_request.start_date, sync_request.end_date))
+    try:
+        current_ftp = await planner.get_current_ftp()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def ndjson_lines():
+        async for workout in planner.stream_training_plan(
+            races=inputs['races'],
+            power_goals=inputs['power_goals'],
+            calendar=inputs['calendar'],
+            start_date=sync_request.start_date,
+            end_date=sync_request.end_date,
+            current_ftp=current_ftp
+        ):
+            yield json.dumps(jsonable_encoder(workout)) + '\n'
+
+    return StreamingResponse(ndjson_lines(), media_type='application/x-ndjson')
+
+@router.post('/sync-jobs', status_code=202)
+async def submit_sync_job(
+    sync_request: SyncRequest,
+    db: AsyncSession = Depends(get_async_db),
+    intervals_client: AsyncIntervalsClient = Depends(get_intervals_client)
+):
+    """Lancer la synchronisation en arrière-plan et retourner immédiatement l'identifiant du job"""
+    job = await get_sync_job_queue().submit(
+        db,
+        athlete_id=intervals_client.athlete_id,
+        start_date=sync_request.start_date,
+        end_date=sync_request.end_date,
+        prompt=sync_request.prompt
+    )
+    return {'job_id': job.id, 'status': job.status}
+
+@router.get('/sync-jobs/{job_id}')
+async def get_sync_job(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    job = await db.get(SyncJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job non trouvé")
+
+    result = job.result or {}
+    return {
+        'job_id': job.id,
+        'status': job.status,
+        'progress': job.progress,
+        'total': job.total,
+        'error': job.error,
+        'created_at': job.created_at,
+        'updated_at': job.updated_at,
+        'synced_workouts': result.get('synced_workouts', []),
+        'failed_workouts': result.get('failed_workouts', []),
+        'result': result or None
+    }
+
+@router.post('/sync-status')
+async def reconcile_sync_status(
+    status_request: SyncStatusRequest,
+    db: AsyncSession = Depends(get_async_db),
+    intervals_client: AsyncIntervalsClient = Depends(get_intervals_client)
+):
+    """Rapprocher toutes les séances synchronisées d'une période en un seul appel amont"""
+    sync_service = SyncService(intervals_client, db=db)
+    try:
+        workouts = await sync_service.ledger_workouts(status_request.start_date, status_request.end_date)
+        status = await sync_service.check_sync_status(workouts)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        'synced': sum(1 for s in status if s['status'] == 'synced'),
+        'missing': sum(1 for s in status if s['status'] == 'missing'),
+        'modified': sum(1 for s in status if s['status'] == 'modified'),
+        'errors': sum(1 for s in status if s['status'] == 'error'),
+        'workouts': status
+    }
+
 @router.get('/sync-status/{workout_id}')
 async def check_sync_status(
     workout_id: str,
-    intervals_client: IntervalsClient = Depends(get_intervals_client)
+    db: AsyncSession = Depends(get_async_db),
+    intervals_client: AsyncIntervalsClient = Depends(get_intervals_client)
 ):
-    sync_service = SyncService(intervals_client)
+    sync_service = SyncService(intervals_client, db=db)
     try:
         status = await sync_service.check_sync_status([{'intervals_id': workout_id}])
         return status[0] if status else None
@@ -77,11 +163,17 @@ async def check_sync_status(
 @router.post('/resync-failed')
 async def resync_failed_workouts(
     failed_workouts: List[dict],
-    intervals_client: IntervalsClient = Depends(get_intervals_client)
+    db: AsyncSession = Depends(get_async_db),
+    intervals_client: AsyncIntervalsClient = Depends(get_intervals_client)
 ):
-    sync_service = SyncService(intervals_client)
+    sync_service = SyncService(intervals_client, db=db)
     try:
         result = await sync_service.resync_failed_workouts(failed_workouts)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get('/rate-limit')
+async def get_rate_limit_status():
+    """État du limiteur de débit vers intervals.icu (file d'attente, clés suspendues)"""
+    return get_rate_limiter().stats()
@@ -8,6 +8,67 @@ class Settings(BaseSettings):
     jwt_algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     intervals_api_url: str = "https://intervals.icu/api/v1"
+    intervals_api_key: str = ""
+    intervals_athlete_id: str = "0"  # 0 = athlète associé à la clé API
+
+    # Pool de connexions PostgreSQL
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0  # Attente maximale d'une connexion libre
+    db_pool_recycle: int = 1800  # Secondes avant de renouveler une connexion
+    db_pool_pre_ping: bool = True
+    db_statement_timeout_ms: int = 30000  # 0 pour désactiver
+
+    # Pool de connexions HTTP vers intervals.icu (partagé par worker)
+    intervals_timeout: float = 10.0
+    intervals_connect_timeout: float = 5.0
+    intervals_pool_max_connections: int = 20
+    intervals_pool_max_keepalive: int = 10
+    intervals_keepalive_expiry: float = 30.0
+    intervals_http2: bool = False  # Nécessite le paquet h2
+
+    # Limitation de débit vers intervals.icu (requêtes par seconde)
+    intervals_rate_limit: float = 10.0  # Par clé API
+    intervals_rate_burst: float = 20.0
+    intervals_global_rate_limit: float = 50.0  # Tous athlètes confondus
+    intervals_global_rate_burst: float = 100.0
+    intervals_rate_limit_retries: int = 5
+    intervals_backoff_base: float = 1.0
+    intervals_backoff_max: float = 60.0
+
+    # Cache de l'historique de forme (secondes, 0 pour désactiver)
+    fitness_cache_ttl: float = 300.0
+
+    # Copie locale de l'historique de forme
+    fitness_history_days: int = 90  # Fenêtre analysée par défaut
+    fitness_mirror_backfill_days: int = 730  # Import initial
+    fitness_mirror_refresh_seconds: int = 300
+
+    # Modèle de charge (constantes de temps en jours)
+    ctl_time_constant: float = 42.0
+    atl_time_constant: float = 7.0
+
+    # Régression des prédictions : "numpy" ou "sklearn" (paquet scikit-learn requis)
+    prediction_backend: str = "numpy"
+
+    # Calculs hors de la boucle asyncio
+    compute_thread_workers: int = 4
+    compute_process_workers: int = 2  # 0 = threads uniquement
+    compute_max_pending: int = 32  # Au-delà, réponse 503
+
+    # Envoi des séances vers intervals.icu
+    sync_max_in_flight: int = 8
+    sync_max_retries: int = 2
+    sync_retry_backoff: float = 0.5  # Secondes, doublé à chaque tentative
+    intervals_bulk_events: bool = True  # Utiliser l'endpoint d'envoi groupé s'il existe
+    sync_bulk_chunk_size: int = 50
+    sync_job_workers: int = 2  # Synchronisations en arrière-plan simultanées
+    sync_job_lease_seconds: int = 300  # Job `running` sans progression depuis ce délai : repris
+
+    # Import iCalendar : les événements sont des plages occupées
+    calendar_timezone: str = "Europe/Paris"  # Fuseau local des créneaux
+    calendar_day_start: str = "06:00"  # Plage où une séance peut avoir lieu
+    calendar_day_end: str = "22:00"
 
     class Config:
         env_file = ".env"
@@ -1,18 +1,48 @@
-from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 from ..core.config import get_settings
 
 settings = get_settings()
 
-engine = create_engine(settings.database_url)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _engine_options(url) -> dict:
+    """Options de pool et délai maximal des requêtes, pour PostgreSQL uniquement"""
+    if url.get_backend_name() != 'postgresql':
+        return {}
+
+    options = {
+        'pool_size': settings.db_pool_size,
+        'max_overflow': settings.db_max_overflow,
+        'pool_timeout': settings.db_pool_timeout,
+        'pool_recycle': settings.db_pool_recycle,
+        'pool_pre_ping': settings.db_pool_pre_ping
+    }
+    if settings.db_statement_timeout_ms:
+        options['connect_args'] = {'server_settings': {'statement_timeout': str(settings.db_statement_timeout_ms)}}
+    return options
+
+def _database_url(database_url: str):
+    # SQLAlchemy ne reconnaît pas l'ancien schéma postgres://
+    if database_url.startswith('postgres://'):
+        database_url = 'postgresql://' + database_url[len('postgres://'):]
+    return make_url(database_url)
+
+def _async_url(database_url: str):
+    """Même base que `database_url`, via le pilote asyncpg (aiosqlite pour SQLite)"""
+    url = _database_url(database_url)
+    if url.get_backend_name() == 'postgresql':
+        return url.set(drivername='postgresql+asyncpg')
+    if url.get_backend_name() == 'sqlite':
+        return url.set(drivername='sqlite+aiosqlite')
+    return url
+
+# Moteur asynchrone : les routes n'occupent pas la boucle pendant les requêtes SQL
+async_url = _async_url(settings.database_url)
+async_engine = create_async_engine(async_url, **_engine_options(async_url))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -1,6 +1,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .api import auth, goals, calendar
+from .api import auth, goals, calendar, sync, predictions, plans
+from .services.intervals_client import close_http_pools
+from .services.sync_jobs import get_sync_job_queue
+from .services.compute_executor import get_compute_executor
 
 app = FastAPI(
     title="Training Planner API",
@@ -20,6 +23,21 @@ app.add_middleware(
 app.include_router(auth.router, prefix="/api")
 app.include_router(goals.router, prefix="/api/goals")
 app.include_router(calendar.router, prefix="/api/calendar")
+app.include_router(sync.router, prefix="/api/sync")
+app.include_router(predictions.router, prefix="/api/predictions")
+app.include_router(plans.router, prefix="/api/plans")
+
+@app.on_event("startup")
+async def startup():
+    # Reprendre les synchronisations interrompues et démarrer les workers
+    await get_sync_job_queue().start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await get_sync_job_queue().stop()
+    # Libérer les connexions keep-alive vers intervals.icu
+    await close_http_pools()
+    get_compute_executor().shutdown()
 
 @app.get("/")
 async def read_root():
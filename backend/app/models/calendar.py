@@ -10,5 +10,22 @@ class DaySettings(Base):
     available = Column(Boolean, default=True)
     time_slots = Column(JSON)  # Liste des créneaux horaires
     is_remote_work = Column(Boolean, default=False)
+    notes = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class AvailabilityRule(Base):
+    """Disponibilité récurrente ; une ligne DaySettings pour une date la remplace ce jour-là"""
+    __tablename__ = "availability_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    weekdays = Column(JSON)  # Jours concernés, 0 = lundi ... 6 = dimanche
+    interval_weeks = Column(Integer, default=1)  # Toutes les N semaines depuis start_date
+    start_date = Column(DateTime)
+    end_date = Column(DateTime, nullable=True)  # Sans fin si vide
+    available = Column(Boolean, default=True)
+    time_slots = Column(JSON)
+    is_remote_work = Column(Boolean, default=False)
+    notes = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, UniqueConstraint
+from ..db.database import Base
+from datetime import datetime
+
+class FitnessHistory(Base):
+    __tablename__ = "fitness_history"
+    __table_args__ = (
+        UniqueConstraint("athlete_id", "date", name="uq_fitness_history_athlete_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    athlete_id = Column(String, index=True)
+    date = Column(Date)
+    ctl = Column(Float)
+    atl = Column(Float)
+    tsb = Column(Float)
+    ftp = Column(Float)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class FitnessSyncState(Base):
+    __tablename__ = "fitness_sync_state"
+
+    athlete_id = Column(String, primary_key=True)
+    watermark = Column(Date)  # Dernier jour importé depuis intervals.icu
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
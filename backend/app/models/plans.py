@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, JSON, ForeignKey, UniqueConstraint
+from ..db.database import Base
+from datetime import datetime
+
+class TrainingPlan(Base):
+    __tablename__ = "training_plans"
+
+    id = Column(Integer, primary_key=True, index=True)
+    athlete_id = Column(String, unique=True, index=True)  # Dernier plan généré par athlète
+    start_date = Column(DateTime)
+    end_date = Column(DateTime)
+    ftp = Column(Float)
+    version = Column(Integer, default=0)
+    inputs_hash = Column(String(64))  # Courses, objectifs, révision du calendrier et FTP
+    stale = Column(Boolean, default=False)  # Entrées modifiées sans replanification possible
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class PlannedWorkout(Base):
+    __tablename__ = "planned_workouts"
+    __table_args__ = (
+        UniqueConstraint("plan_id", "date", name="uq_planned_workouts_plan_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    plan_id = Column(Integer, ForeignKey("training_plans.id", ondelete="CASCADE"), index=True)
+    date = Column(DateTime)
+    name = Column(String)
+    description = Column(String)
+    intervals = Column(JSON)
@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, JSON, UniqueConstraint
+from ..db.database import Base
+from datetime import datetime
+
+class SyncLedgerEntry(Base):
+    __tablename__ = "sync_ledger"
+    __table_args__ = (
+        UniqueConstraint("athlete_id", "date", name="uq_sync_ledger_athlete_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    athlete_id = Column(String, index=True)
+    date = Column(Date)
+    content_hash = Column(String(64))  # SHA-256 du format intervals.icu envoyé
+    intervals_id = Column(String)
+    remote_version = Column(String, nullable=True)  # Champ `updated` amont, ou empreinte de l'événement renvoyé
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class SyncJob(Base):
+    __tablename__ = "sync_jobs"
+
+    id = Column(String(36), primary_key=True)  # UUID
+    athlete_id = Column(String, index=True)
+    status = Column(String, index=True, default="pending")  # pending, running, completed, failed
+    owner = Column(String, nullable=True)  # Worker qui exécute le job (hôte:pid)
+    start_date = Column(DateTime)
+    end_date = Column(DateTime)
+    prompt = Column(String, nullable=True)
+    progress = Column(Integer, default=0)
+    total = Column(Integer, default=0)
+    result = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Sert de battement de cœur
@@ -0,0 +1,99 @@
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from ..models.calendar import DaySettings, AvailabilityRule
+
+class AvailabilityDay(NamedTuple):
+    """Disponibilité d'un jour, issue d'une ligne DaySettings ou d'une règle récurrente"""
+    id: Optional[int]  # Identifiant DaySettings, None pour un jour issu d'une règle
+    date: datetime
+    available: bool
+    time_slots: List[Dict[str, Any]]
+    is_remote_work: bool
+    notes: Optional[str]
+    rule_id: Optional[int] = None
+
+def expand_calendar(
+    rules: Iterable[AvailabilityRule],
+    overrides: Iterable[DaySettings],
+    start: date,
+    end: date
+) -> Iterator[AvailabilityDay]:
+    """Jours disponibles ou non de [start, end], calculés à la volée.
+
+    Une ligne DaySettings l'emporte sur les règles ; entre règles, la plus
+    récente l'emporte. Les jours couverts par aucune des deux sont omis,
+    comme un jour sans paramètres.
+    """
+    override_index = {_as_date(day.date): day for day in overrides}
+
+    # Règles par jour de la semaine, la plus récente en premier
+    by_weekday: List[List[AvailabilityRule]] = [[] for _ in range(7)]
+    for rule in sorted(rules, key=lambda r: r.id or 0, reverse=True):
+        for weekday in rule.weekdays or []:
+            by_weekday[weekday].append(rule)
+
+    day = start
+    while day <= end:
+        override = override_index.get(day)
+        if override is not None:
+            yield AvailabilityDay(
+                override.id,
+                datetime.combine(day, datetime.min.time()),
+                override.available,
+                override.time_slots or [],
+                override.is_remote_work,
+                override.notes
+            )
+        else:
+            rule = next((r for r in by_weekday[day.weekday()] if rule_applies(r, day)), None)
+            if rule is not None:
+                yield AvailabilityDay(
+                    None,
+                    datetime.combine(day, datetime.min.time()),
+                    rule.available,
+                    rule.time_slots or [],
+                    rule.is_remote_work,
+                    rule.notes,
+                    rule.id
+                )
+        day += timedelta(days=1)
+
+def rule_applies(rule: AvailabilityRule, day: date) -> bool:
+    start = _as_date(rule.start_date)
+    if day < start or (rule.end_date is not None and day > _as_date(rule.end_date)):
+        return False
+    # Semaines calendaires écoulées depuis la semaine de début de la règle
+    weeks = ((day - start).days + start.weekday()) // 7
+    return weeks % (rule.interval_weeks or 1) == 0
+
+def load_calendar(db: Session, start: date, end: date) -> List[AvailabilityDay]:
+    """Calendrier effectif de la période : règles chargées une fois, jours calculés sans être stockés"""
+    start = _as_date(start)
+    end = _as_date(end)
+    overrides = db.query(DaySettings).filter(
+        DaySettings.date >= start,
+        DaySettings.date < end + timedelta(days=1)
+    ).all()
+    rules = db.query(AvailabilityRule).filter(
+        AvailabilityRule.start_date < end + timedelta(days=1),
+        or_(AvailabilityRule.end_date.is_(None), AvailabilityRule.end_date >= start)
+    ).all()
+    return list(expand_calendar(rules, overrides, start, end))
+
+def calendar_revision(db: Session, start: date, end: date) -> List[Any]:
+    """Révision du calendrier de la période : nombre de lignes et dernière modification, jours et règles"""
+    days = db.query(
+        func.count(DaySettings.id), func.max(DaySettings.updated_at)
+    ).filter(DaySettings.date >= _as_date(start), DaySettings.date <= end).one()
+    rules = db.query(
+        func.count(AvailabilityRule.id), func.max(AvailabilityRule.updated_at)
+    ).filter(
+        AvailabilityRule.start_date <= end,
+        or_(AvailabilityRule.end_date.is_(None), AvailabilityRule.end_date >= _as_date(start))
+    ).one()
+    return list(days) + list(rules)
+
+def _as_date(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
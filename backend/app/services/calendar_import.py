@@ -0,0 +1,325 @@
+import codecs
+import csv
+import re
+from datetime import date, datetime, time, timedelta, timezone
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple, Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.config import get_settings
+from .time_slots import slot_error
+
+# Une ligne de staging : un créneau (ou une journée sans créneau) pour une date ;
+# `busy` : le créneau est une plage occupée (iCalendar), remplacée à la fusion par son complément
+StagingRow = Tuple[datetime, bool, Optional[str], Optional[str], bool, Optional[str], bool]
+
+STAGING_COLUMNS = ['date', 'available', 'slot_start', 'slot_end', 'is_remote_work', 'notes', 'busy']
+
+# Au-delà, les erreurs suivantes sont seulement comptées
+MAX_REPORTED_ERRORS = 50
+
+MINUTES_PER_DAY = 24 * 60
+
+DURATION_PATTERN = re.compile(
+    r'(?P<sign>[+-])?P(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?'
+    r'(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?'
+)
+
+class ImportErrors:
+    """Erreurs de lecture du fichier, accumulées sans interrompre le flux"""
+
+    def __init__(self):
+        self.count = 0
+        self.items: List[Dict[str, Any]] = []
+
+    def add(self, line: int, error: str):
+        self.count += 1
+        if len(self.items) < MAX_REPORTED_ERRORS:
+            self.items.append({'line': line, 'error': error})
+
+async def iter_lines(chunks: AsyncIterator[bytes], encoding: str = 'utf-8') -> AsyncIterator[str]:
+    """Découper un flux d'octets en lignes, sans charger le fichier en mémoire"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    pending = ''
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            yield line.rstrip('\r')
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending.rstrip('\r')
+
+async def iter_csv_rows(lines: AsyncIterator[str], errors: ImportErrors) -> AsyncIterator[StagingRow]:
+    """Lignes CSV `date,available,start,end,is_remote_work,notes` (en-tête obligatoire).
+
+    Une ligne par créneau : plusieurs lignes d'une même date sont fusionnées
+    à l'import. `start`/`end` vides pour une journée sans créneau.
+    """
+    header = None
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        # Les champs entre guillemets sur plusieurs lignes ne sont pas acceptés
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [value.strip().lower() for value in values]
+            if 'date' not in header:
+                errors.add(line_number, "En-tête CSV sans colonne date")
+                return
+            continue
+
+        record = dict(zip(header, (value.strip() for value in values)))
+        try:
+            slot_start, slot_end = _parse_slot(record.get('start'), record.get('end'))
+            yield (
+                datetime.combine(date.fromisoformat(record['date']), time.min),
+                _parse_bool(record.get('available'), True),
+                slot_start,
+                slot_end,
+                _parse_bool(record.get('is_remote_work'), False),
+                record.get('notes') or None,
+                False
+            )
+        except (KeyError, ValueError) as e:
+            errors.add(line_number, str(e))
+
+async def iter_ical_rows(lines: AsyncIterator[str], errors: ImportErrors) -> AsyncIterator[StagingRow]:
+    """Événements VEVENT d'un fichier iCalendar, lus comme des plages occupées.
+
+    Un calendrier de travail décrit le temps pris : chaque jour touché par
+    un événement reçoit comme créneaux disponibles le complément de ses
+    événements dans la plage `calendar_day_start`-`calendar_day_end`
+    (calculé à la fusion) ; un événement sur la journée entière, ou qui
+    couvre toute la plage, rend le jour indisponible. Les heures UTC (`Z`)
+    ou avec `TZID` sont converties dans `calendar_timezone`, les heures
+    flottantes sont déjà locales. La fin vient de DTEND ou de DURATION ;
+    sans l'un ni l'autre, un événement sur la journée dure un jour et un
+    événement horaire n'occupe pas de temps (RFC 5545). Les règles de
+    récurrence sont ignorées.
+
+    Chaque plage est envoyée dès la fin de son événement.
+    """
+    zone = ZoneInfo(get_settings().calendar_timezone)
+    event: Optional[Dict[str, Tuple[str, Dict[str, str]]]] = None
+    event_line = 0
+    async for line_number, name, params, value in _unfold(lines):
+        if name == 'BEGIN' and value == 'VEVENT':
+            event = {}
+            event_line = line_number
+        elif name == 'END' and value == 'VEVENT' and event is not None:
+            try:
+                spans = _event_spans(event, zone)
+            except (KeyError, ValueError) as e:
+                errors.add(event_line, f"Événement invalide : {e}")
+            else:
+                summary = event.get('SUMMARY', ('', {}))[0] or None
+                for day, (start, end) in spans:
+                    yield (datetime.combine(day, time.min), True, _hhmm(start), _hhmm(end), False, summary, True)
+            event = None
+        elif event is not None:
+            event[name] = (value, params)
+
+async def _unfold(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, str, Dict[str, str], str]]:
+    """Propriétés iCalendar (ligne, nom, paramètres, valeur), lignes repliées recollées"""
+    current = None
+    current_line = 0
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield (current_line, *_split_property(current))
+        current = line
+        current_line = line_number
+    if current:
+        yield (current_line, *_split_property(current))
+
+def _split_property(line: str) -> Tuple[str, Dict[str, str], str]:
+    name, _, value = line.partition(':')
+    name, *params = name.split(';')
+    parsed = {}
+    for param in params:
+        key, _, param_value = param.partition('=')
+        parsed[key.upper()] = param_value.strip('"')
+    return name.upper(), parsed, value.strip()
+
+def _event_spans(event: Dict[str, Tuple[str, Dict[str, str]]], zone: ZoneInfo) -> List[Tuple[date, Tuple[int, int]]]:
+    """Plages occupées par l'événement, jour par jour, en minutes depuis minuit (heure locale)"""
+    start = _event_time(event['DTSTART'], zone)
+    if 'DTEND' in event:
+        end = _event_time(event['DTEND'], zone)
+        if isinstance(end, datetime) != isinstance(start, datetime):
+            raise ValueError("DTSTART et DTEND de types différents")
+    elif 'DURATION' in event:
+        end = start + _parse_duration(event['DURATION'][0])
+    else:
+        # Valeurs par défaut de la RFC 5545 : un jour, ou aucune durée pour un événement horaire
+        end = start if isinstance(start, datetime) else start + timedelta(days=1)
+    if end < start:
+        raise ValueError("fin avant le début")
+
+    if not isinstance(start, datetime):
+        # Journée entière : la fin est exclue
+        return [(start + timedelta(days=offset), (0, MINUTES_PER_DAY)) for offset in range((end - start).days)]
+    spans = []
+    day = start.date()
+    while datetime.combine(day, time.min) < end:
+        midnight = datetime.combine(day, time.min)
+        span_start = max(start, midnight) - midnight
+        span_end = min(end, midnight + timedelta(days=1)) - midnight
+        if span_end > span_start:
+            spans.append((day, (int(span_start.total_seconds()) // 60, -(-int(span_end.total_seconds()) // 60))))
+        day += timedelta(days=1)
+    return spans
+
+def _event_time(prop: Tuple[str, Dict[str, str]], zone: ZoneInfo) -> Union[date, datetime]:
+    """Date d'un événement sur la journée, sinon heure locale (naïve) dans `zone`"""
+    value, params = prop
+    if params.get('VALUE') == 'DATE':
+        return datetime.strptime(value, '%Y%m%d').date()
+
+    utc = value.endswith('Z')
+    moment = datetime.strptime(value[:-1] if utc else value, '%Y%m%dT%H%M%S')
+    if utc:
+        moment = moment.replace(tzinfo=timezone.utc)
+    elif 'TZID' in params:
+        try:
+            moment = moment.replace(tzinfo=ZoneInfo(params['TZID']))
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Fuseau inconnu : {params['TZID']}")
+    else:
+        return moment  # Heure flottante : déjà locale
+    return moment.astimezone(zone).replace(tzinfo=None)
+
+def _parse_duration(value: str) -> timedelta:
+    """Durée iCalendar (`P1D`, `PT1H30M`, `P2W`...)"""
+    match = DURATION_PATTERN.fullmatch(value)
+    if not match or not any(match.group(unit) for unit in ('weeks', 'days', 'hours', 'minutes', 'seconds')):
+        raise ValueError(f"Durée invalide : {value}")
+    duration = timedelta(**{unit: int(amount) for unit, amount in match.groupdict().items() if unit != 'sign' and amount})
+    return -duration if match.group('sign') == '-' else duration
+
+def _minutes(value: str) -> int:
+    parsed = datetime.strptime(value, '%H:%M')
+    return parsed.hour * 60 + parsed.minute
+
+def _hhmm(minutes: int) -> str:
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+def _parse_bool(value: Optional[str], default: bool) -> bool:
+    if value is None or value == '':
+        return default
+    lowered = value.lower()
+    if lowered in ('1', 'true', 'yes', 'oui', 'y'):
+        return True
+    if lowered in ('0', 'false', 'no', 'non', 'n'):
+        return False
+    raise ValueError(f"Booléen invalide : {value}")
+
+def _parse_slot(start: Optional[str], end: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Créneau d'une ligne CSV, normalisé en HH:MM ; (None, None) pour une journée sans créneau"""
+    if not start and not end:
+        return None, None
+    if not start or not end:
+        raise ValueError(f"Créneau incomplet {start or '?'}-{end or '?'} (début et fin attendus)")
+    error = slot_error(start, end)
+    if error:
+        raise ValueError(error)
+    return _hhmm(_minutes(start)), _hhmm(_minutes(end))
+
+class CalendarImporter:
+    """Chargement d'un calendrier via COPY dans une table temporaire, puis fusion dans `day_settings`.
+
+    Les lignes sont envoyées au fil de la lecture : la mémoire utilisée ne
+    dépend pas de la taille du fichier. Tout est fait dans la transaction
+    de la session, que l'appelant valide ou annule.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def load(self, rows: AsyncIterator[StagingRow]) -> Dict[str, Any]:
+        await self.db.execute(text(
+            "CREATE TEMP TABLE day_settings_staging ("
+            " date timestamp NOT NULL, available boolean NOT NULL,"
+            " slot_start text, slot_end text, is_remote_work boolean NOT NULL, notes text, busy boolean NOT NULL"
+            ") ON COMMIT DROP"
+        ))
+
+        connection = await self.db.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            'day_settings_staging', records=rows, columns=STAGING_COLUMNS
+        )
+
+        stats = (await self.db.execute(text(
+            "SELECT count(*), count(DISTINCT date), min(date), max(date) FROM day_settings_staging"
+        ))).one()
+
+        await self._replace_busy_spans()
+
+        # Une ligne par date : créneaux agrégés, indisponible si une ligne l'indique
+        await self.db.execute(text(
+            "INSERT INTO day_settings (date, available, time_slots, is_remote_work, notes, created_at, updated_at)"
+            " SELECT date, bool_and(available),"
+            " coalesce(json_agg(json_build_object('start', slot_start, 'end', slot_end) ORDER BY slot_start)"
+            " FILTER (WHERE slot_start IS NOT NULL AND slot_end IS NOT NULL), '[]'::json),"
+            " bool_or(is_remote_work), string_agg(notes, '; '), :now, :now"
+            " FROM day_settings_staging GROUP BY date"
+            " ON CONFLICT (date) DO UPDATE SET"
+            " available = excluded.available, time_slots = excluded.time_slots,"
+            " is_remote_work = excluded.is_remote_work, notes = excluded.notes, updated_at = excluded.updated_at"
+        ), {'now': datetime.utcnow()})
+
+        return {
+            'rows': stats[0],
+            'days': stats[1],
+            'start_date': stats[2],
+            'end_date': stats[3]
+        }
+
+    async def _replace_busy_spans(self):
+        """Remplacer les plages occupées de chaque jour par les créneaux libres de la plage horaire des séances.
+
+        Un jour entièrement occupé devient indisponible ; les plages gardent
+        leurs notes, sans créneau.
+        """
+        settings = get_settings()
+        bounds = {
+            'day_start': datetime.strptime(settings.calendar_day_start, '%H:%M').time(),
+            'day_end': datetime.strptime(settings.calendar_day_end, '%H:%M').time()
+        }
+        # Trous entre plages triées : `covered` est la fin la plus tardive des plages précédentes
+        await self.db.execute(text(
+            "WITH spans AS ("
+            "  SELECT date, CAST(slot_start AS time) AS busy_start, CAST(slot_end AS time) AS busy_end,"
+            "  max(CAST(slot_end AS time)) OVER ("
+            "   PARTITION BY date ORDER BY CAST(slot_start AS time), CAST(slot_end AS time)"
+            "   ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING"
+            "  ) AS covered"
+            "  FROM day_settings_staging WHERE busy"
+            " ), gaps AS ("
+            "  SELECT date, greatest(covered, CAST(:day_start AS time)) AS gap_start,"
+            "  least(busy_start, CAST(:day_end AS time)) AS gap_end FROM spans"
+            "  UNION ALL"
+            "  SELECT date, greatest(max(busy_end), CAST(:day_start AS time)), CAST(:day_end AS time)"
+            "  FROM spans GROUP BY date"
+            " )"
+            " INSERT INTO day_settings_staging (date, available, slot_start, slot_end, is_remote_work, notes, busy)"
+            " SELECT date, true, to_char(CAST(gap_start AS interval), 'HH24:MI'), to_char(CAST(gap_end AS interval), 'HH24:MI'),"
+            " false, NULL, false"
+            " FROM gaps WHERE gap_end > gap_start"
+        ), bounds)
+        await self.db.execute(text(
+            "INSERT INTO day_settings_staging (date, available, slot_start, slot_end, is_remote_work, notes, busy)"
+            " SELECT date, false, NULL, NULL, false, NULL, false"
+            " FROM day_settings_staging GROUP BY date HAVING bool_and(busy)"
+        ))
+        await self.db.execute(text(
+            "UPDATE day_settings_staging SET slot_start = NULL, slot_end = NULL, busy = false WHERE busy"
+        ))
@@ -0,0 +1,69 @@
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+from ..core.config import get_settings
+
+class ComputeQueueFull(Exception):
+    """Trop de calculs en attente : la requête doit être refusée plutôt que mise en file"""
+
+class ComputeExecutor:
+    """Exécute les calculs hors de la boucle asyncio.
+
+    `run_thread` pour le travail court ou qui libère le GIL, `run_process`
+    pour le calcul lourd : la fonction et ses arguments doivent alors être
+    picklables (fonctions de module, données simples, pas d'objets ORM ni
+    de clients HTTP). Au-delà de `max_pending` calculs en cours ou en
+    attente, `ComputeQueueFull` est levée.
+    """
+
+    def __init__(self, thread_workers: int, process_workers: int, max_pending: int):
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+
+    async def run_thread(self, func: Callable, *args, **kwargs) -> Any:
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(self.thread_workers, thread_name_prefix='compute')
+        return await self._submit(self._threads, func, *args, **kwargs)
+
+    async def run_process(self, func: Callable, *args, **kwargs) -> Any:
+        # Sans processus configurés (développement, tests), repli sur les threads
+        if self.process_workers <= 0:
+            return await self.run_thread(func, *args, **kwargs)
+        if self._processes is None:
+            self._processes = ProcessPoolExecutor(self.process_workers)
+        return await self._submit(self._processes, func, *args, **kwargs)
+
+    async def _submit(self, executor: Executor, func: Callable, *args, **kwargs) -> Any:
+        if self.pending >= self.max_pending:
+            raise ComputeQueueFull(f"{self.pending} calculs en attente")
+
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, partial(func, *args, **kwargs))
+        finally:
+            self.pending -= 1
+
+    def shutdown(self):
+        for executor in (self._threads, self._processes):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._threads = None
+        self._processes = None
+
+_executor: Optional[ComputeExecutor] = None
+
+def get_compute_executor() -> ComputeExecutor:
+    global _executor
+    if _executor is None:
+        settings = get_settings()
+        _executor = ComputeExecutor(
+            settings.compute_thread_workers,
+            settings.compute_process_workers,
+            settings.compute_max_pending
+        )
+    return _executor
@@ -0,0 +1,100 @@
+import asyncio
+import time
+from datetime import date
+from typing import List, Dict, Any, Tuple, Hashable, Callable, Awaitable, Optional
+
+FetchFunc = Callable[[date, date], Awaitable[List[Dict[str, Any]]]]
+
+class _CacheEntry:
+    __slots__ = ('start', 'end', 'expires_at', 'rows')
+
+    def __init__(self, start: date, end: date, expires_at: float, rows: List[Dict[str, Any]]):
+        self.start = start
+        self.end = end
+        self.expires_at = expires_at
+        self.rows = rows
+
+    def covers(self, start: date, end: date) -> bool:
+        return self.start <= start and self.end >= end
+
+def _slice_rows(rows: List[Dict[str, Any]], start: date, end: date) -> List[Dict[str, Any]]:
+    """Extraire les jours [start, end] d'un historique trié par date"""
+    start_key = start.isoformat()
+    end_key = end.isoformat()
+    return [row for row in rows if start_key <= str(row.get('date', ''))[:10] <= end_key]
+
+class FitnessHistoryCache:
+    """Cache en mémoire de l'historique de forme, par athlète et plage de dates.
+
+    Une plage demandée est servie depuis toute entrée non expirée qui la
+    contient (une fenêtre de 90 jours depuis une fenêtre de 180 jours), et
+    les appels concurrents sur une même plage partagent une seule requête
+    amont (single-flight). Les lignes retournées sont partagées et ne
+    doivent pas être modifiées.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[Hashable, List[_CacheEntry]] = {}
+        self._inflight: Dict[Hashable, List[Tuple[date, date, asyncio.Task]]] = {}
+
+    def _lookup(self, key: Hashable, start: date, end: date) -> Optional[List[Dict[str, Any]]]:
+        now = time.monotonic()
+        entries = [e for e in self._entries.get(key, []) if e.expires_at > now]
+        if entries:
+            self._entries[key] = entries
+        else:
+            self._entries.pop(key, None)
+
+        for entry in entries:
+            if entry.covers(start, end):
+                return _slice_rows(entry.rows, start, end)
+        return None
+
+    def _store(self, key: Hashable, start: date, end: date, rows: List[Dict[str, Any]]):
+        if self.ttl <= 0:
+            return
+        entry = _CacheEntry(start, end, time.monotonic() + self.ttl, rows)
+        # Les plages contenues dans la nouvelle entrée deviennent inutiles
+        kept = [e for e in self._entries.get(key, []) if not entry.covers(e.start, e.end)]
+        kept.append(entry)
+        self._entries[key] = kept
+
+    async def get(self, key: Hashable, start: date, end: date, fetch: FetchFunc) -> List[Dict[str, Any]]:
+        rows = self._lookup(key, start, end)
+        if rows is not None:
+            return rows
+
+        # Rejoindre une requête déjà en cours qui couvre la plage
+        for flight_start, flight_end, task in self._inflight.get(key, []):
+            if flight_start <= start and flight_end >= end:
+                rows = await asyncio.shield(task)
+                return _slice_rows(rows, start, end)
+
+        # La requête amont vit dans sa propre tâche : l'annulation de l'appelant
+        # qui l'a lancée (client déconnecté) n'interrompt pas les autres
+        task = asyncio.ensure_future(self._fetch(key, start, end, fetch))
+        flight = (start, end, task)
+        self._inflight.setdefault(key, []).append(flight)
+        task.add_done_callback(lambda _: self._land(key, flight))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: Hashable, start: date, end: date, fetch: FetchFunc) -> List[Dict[str, Any]]:
+        rows = await fetch(start, end)
+        self._store(key, start, end, rows)
+        return rows
+
+    def _land(self, key: Hashable, flight: Tuple[date, date, asyncio.Task]):
+        flights = self._inflight.get(key, [])
+        flights.remove(flight)
+        if not flights:
+            self._inflight.pop(key, None)
+        task = flight[2]
+        if not task.cancelled():
+            task.exception()  # Évite l'avertissement si plus personne n'attendait
+
+    def invalidate(self, key: Hashable = None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
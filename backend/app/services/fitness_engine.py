@@ -0,0 +1,109 @@
+import math
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, NamedTuple, Optional
+import numpy as np
+from ..core.config import get_settings
+from .workout_arrays import CompactPlan
+
+class FitnessState(NamedTuple):
+    """CTL et ATL à la fin d'une journée : suffisent pour calculer le jour suivant"""
+    date: date
+    ctl: float
+    atl: float
+
+    @property
+    def tsb(self) -> float:
+        return self.ctl - self.atl
+
+class FitnessEngine:
+    """Modèle de Banister : CTL et ATL sont des moyennes exponentielles du TSS quotidien.
+
+    y[t] = a * y[t-1] + (1 - a) * tss[t], avec a = exp(-1 / constante de temps).
+    Les séries sont calculées par tableaux entiers, un jour supplémentaire
+    s'ajoute en O(1) à partir d'un `FitnessState`.
+    """
+
+    # Taille des blocs du filtre vectorisé : a^-BLOCK reste loin du dépassement
+    BLOCK = 64
+
+    def __init__(self, ctl_days: float = None, atl_days: float = None):
+        settings = get_settings()
+        self.ctl_decay = math.exp(-1 / (ctl_days or settings.ctl_time_constant))
+        self.atl_decay = math.exp(-1 / (atl_days or settings.atl_time_constant))
+
+    def append(self, state: FitnessState, tss: float) -> FitnessState:
+        """État du lendemain après une journée à `tss`"""
+        return FitnessState(
+            state.date + timedelta(days=1),
+            self.ctl_decay * state.ctl + (1 - self.ctl_decay) * tss,
+            self.atl_decay * state.atl + (1 - self.atl_decay) * tss
+        )
+
+    def series(self, daily_tss, initial: Optional[FitnessState] = None) -> Dict[str, np.ndarray]:
+        """CTL, ATL et TSB pour chaque jour de `daily_tss`, à partir de l'état initial"""
+        tss = np.asarray(daily_tss, dtype=np.float64)
+        ctl0 = initial.ctl if initial else 0.0
+        atl0 = initial.atl if initial else 0.0
+        ctl = self._filter(tss, self.ctl_decay, ctl0)
+        atl = self._filter(tss, self.atl_decay, atl0)
+        return {'ctl': ctl, 'atl': atl, 'tsb': ctl - atl}
+
+    def project(self, state: FitnessState, planned_tss) -> List[Dict[str, Any]]:
+        """Trajectoire jour par jour à partir de l'état courant et du TSS prévu"""
+        projected = self.series(planned_tss, state)
+        return [
+            {
+                'date': (state.date + timedelta(days=i + 1)).isoformat(),
+                'ctl': round(float(projected['ctl'][i]), 1),
+                'atl': round(float(projected['atl'][i]), 1),
+                'tsb': round(float(projected['tsb'][i]), 1)
+            }
+            for i in range(len(projected['ctl']))
+        ]
+
+    def _filter(self, x: np.ndarray, a: float, y0: float) -> np.ndarray:
+        # Forme fermée par bloc : y[t] = a^(t+1) * (y0 + (1 - a) * somme(x[i] * a^-(i+1)))
+        out = np.empty_like(x)
+        if not len(x):
+            return out
+        steps = np.arange(1, min(self.BLOCK, len(x)) + 1)
+        growth = a ** -steps
+        decay = a ** steps
+        for offset in range(0, len(x), self.BLOCK):
+            block = x[offset:offset + self.BLOCK]
+            n = len(block)
+            out[offset:offset + n] = decay[:n] * (y0 + (1 - a) * np.cumsum(block * growth[:n]))
+            y0 = out[offset + n - 1]
+        return out
+
+def state_from_history(history: List[Dict[str, Any]]) -> Optional[FitnessState]:
+    """Dernier état connu dans un historique au format intervals.icu"""
+    if not history:
+        return None
+    last = history[-1]
+    return FitnessState(
+        date.fromisoformat(str(last['date'])[:10]),
+        last.get('ctl') or 0.0,
+        last.get('atl') or 0.0
+    )
+
+def planned_daily_tss(workouts: List[Dict[str, Any]], ftp: float, start: date, days: int) -> np.ndarray:
+    """TSS prévu par jour à partir du lendemain de `start`, jours sans séance à zéro"""
+    daily = np.zeros(days)
+    if not workouts or not ftp:
+        return daily
+
+    offsets = np.array([
+        (_as_date(workout['date']) - start).days - 1 for workout in workouts
+    ])
+    tss = CompactPlan.from_dicts(workouts).metrics(ftp)['tss']
+    in_range = (offsets >= 0) & (offsets < days)
+    np.add.at(daily, offsets[in_range], tss[in_range])
+    return daily
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
@@ -0,0 +1,137 @@
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any
+from fastapi import Depends
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+from ..core.config import get_settings
+from ..db.database import get_async_db
+from ..models.fitness import FitnessHistory, FitnessSyncState
+from ..models.plans import TrainingPlan
+from .intervals_client import AsyncIntervalsClient, get_intervals_client
+
+class FitnessHistoryMirror:
+    """Copie locale de l'historique CTL/ATL/TSB/FTP d'intervals.icu.
+
+    Expose la même méthode `get_fitness_history` que le client : seuls les
+    jours postérieurs au watermark de l'athlète sont demandés en amont, le
+    reste est lu dans la table `fitness_history`. Les services l'acceptent
+    en `fitness_source` ; à défaut, ils interrogent directement l'API.
+    """
+
+    def __init__(self, db: AsyncSession, intervals_client: AsyncIntervalsClient):
+        self.db = db
+        self.intervals = intervals_client
+        self.athlete_id = intervals_client.athlete_id
+        self.settings = get_settings()
+
+    async def get_fitness_history(self, start_date: datetime = None, end_date: datetime = None) -> List[Dict[str, Any]]:
+        if not start_date:
+            start_date = datetime.now() - timedelta(days=self.settings.fitness_history_days)
+        if not end_date:
+            end_date = datetime.now()
+
+        await self.refresh()
+
+        result = await self.db.execute(
+            select(FitnessHistory).where(
+                FitnessHistory.athlete_id == self.athlete_id,
+                FitnessHistory.date >= _as_date(start_date),
+                FitnessHistory.date <= _as_date(end_date)
+            ).order_by(FitnessHistory.date)
+        )
+        rows = result.scalars().all()
+
+        return [_to_entry(row) for row in rows]
+
+    async def refresh(self) -> int:
+        """Importer les jours manquants depuis le watermark, retourne le nombre de lignes écrites"""
+        state = await self.db.get(FitnessSyncState, self.athlete_id)
+        today = date.today()
+
+        if state and state.watermark:
+            # Au plus un appel amont par intervalle, que le jour courant soit déjà publié ou non
+            refreshed_seconds = (datetime.utcnow() - state.updated_at).total_seconds() if state.updated_at else None
+            if refreshed_seconds is not None and refreshed_seconds < self.settings.fitness_mirror_refresh_seconds:
+                return 0
+            # Le dernier jour importé peut encore évoluer (séances du jour)
+            start = min(state.watermark, today)
+        else:
+            start = today - timedelta(days=self.settings.fitness_mirror_backfill_days)
+
+        entries = await self.intervals.get_fitness_history(
+            datetime.combine(start, datetime.min.time()),
+            datetime.combine(today, datetime.min.time())
+        )
+
+        rows = [_to_row(self.athlete_id, entry) for entry in entries if entry.get('date')]
+        if rows:
+            statement = insert(FitnessHistory).values(rows)
+            statement = statement.on_conflict_do_update(
+                index_elements=['athlete_id', 'date'],
+                set_={
+                    'ctl': statement.excluded.ctl,
+                    'atl': statement.excluded.atl,
+                    'tsb': statement.excluded.tsb,
+                    'ftp': statement.excluded.ftp,
+                    'updated_at': datetime.utcnow()
+                }
+            )
+            await self.db.execute(statement)
+            await self._invalidate_plans_on_ftp_change(rows)
+
+        watermark = max((row['date'] for row in rows), default=start)
+        if state is None:
+            state = FitnessSyncState(athlete_id=self.athlete_id)
+            self.db.add(state)
+        state.watermark = max(watermark, state.watermark or watermark)
+        state.updated_at = datetime.utcnow()
+        await self.db.commit()
+
+        return len(rows)
+
+    async def _invalidate_plans_on_ftp_change(self, rows: List[Dict[str, Any]]):
+        """Un nouveau FTP rend obsolète le plan enregistré"""
+        latest_ftp = next((row['ftp'] for row in reversed(rows) if row['ftp'] is not None), None)
+        if latest_ftp is None:
+            return
+        await self.db.execute(
+            update(TrainingPlan).where(
+                TrainingPlan.athlete_id == self.athlete_id,
+                TrainingPlan.ftp != latest_ftp
+            ).values(stale=True)
+        )
+
+def _as_date(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+def _to_entry(row: FitnessHistory) -> Dict[str, Any]:
+    entry = {
+        'date': row.date.isoformat(),
+        'ctl': row.ctl,
+        'atl': row.atl,
+        'tsb': row.tsb
+    }
+    # Même forme que la réponse amont : pas de clé ftp si inconnue
+    if row.ftp is not None:
+        entry['ftp'] = row.ftp
+    return entry
+
+def _to_row(athlete_id: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+    ctl = entry.get('ctl', 0)
+    atl = entry.get('atl', 0)
+    return {
+        'athlete_id': athlete_id,
+        'date': date.fromisoformat(str(entry['date'])[:10]),
+        'ctl': ctl,
+        'atl': atl,
+        'tsb': entry.get('tsb', ctl - atl),
+        'ftp': entry.get('ftp')
+    }
+
+def get_fitness_history_mirror(
+    db: AsyncSession = Depends(get_async_db),
+    intervals_client: AsyncIntervalsClient = Depends(get_intervals_client)
+) -> FitnessHistoryMirror:
+    """Dépendance FastAPI : historique de forme lu depuis la copie locale"""
+    return FitnessHistoryMirror(db, intervals_client)
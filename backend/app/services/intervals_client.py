@@ -1,13 +1,99 @@
 import requests
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
+import httpx
+from requests.adapters import HTTPAdapter
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Optional
 from ..core.config import get_settings
+from .fitness_cache import FitnessHistoryCache
+from .rate_limiter import RateLimiter
+
+# Pools HTTP partagés par worker : une seule poignée de main TCP/TLS
+# par connexion, réutilisée d'un appel à l'autre (keep-alive)
+_session: Optional[requests.Session] = None
+_async_client: Optional[httpx.AsyncClient] = None
+_fitness_cache: Optional[FitnessHistoryCache] = None
+_rate_limiter: Optional[RateLimiter] = None
+
+def _get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        settings = get_settings()
+        # Un seul hôte : un seul pool, dont la taille borne les connexions conservées
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.intervals_pool_max_connections
+        )
+        _session = requests.Session()
+        _session.mount('https://', adapter)
+        _session.mount('http://', adapter)
+    return _session
+
+def _get_async_client() -> httpx.AsyncClient:
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        settings = get_settings()
+        _async_client = httpx.AsyncClient(
+            http2=settings.intervals_http2,
+            limits=httpx.Limits(
+                max_connections=settings.intervals_pool_max_connections,
+                max_keepalive_connections=settings.intervals_pool_max_keepalive,
+                keepalive_expiry=settings.intervals_keepalive_expiry
+            ),
+            timeout=httpx.Timeout(
+                settings.intervals_timeout,
+                connect=settings.intervals_connect_timeout
+            )
+        )
+    return _async_client
+
+def _get_fitness_cache() -> FitnessHistoryCache:
+    global _fitness_cache
+    if _fitness_cache is None:
+        _fitness_cache = FitnessHistoryCache(get_settings().fitness_cache_ttl)
+    return _fitness_cache
+
+def get_rate_limiter() -> RateLimiter:
+    global _rate_limiter
+    if _rate_limiter is None:
+        settings = get_settings()
+        _rate_limiter = RateLimiter(
+            rate=settings.intervals_rate_limit,
+            burst=settings.intervals_rate_burst,
+            global_rate=settings.intervals_global_rate_limit,
+            global_burst=settings.intervals_global_rate_burst,
+            backoff_base=settings.intervals_backoff_base,
+            backoff_max=settings.intervals_backoff_max
+        )
+    return _rate_limiter
+
+async def close_http_pools():
+    """Fermer les pools HTTP partagés (arrêt de l'application)"""
+    global _session, _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    if _session is not None:
+        _session.close()
+        _session = None
+
+def _date_range_params(start_date: Optional[datetime], end_date: Optional[datetime], default_days: int) -> Dict[str, str]:
+    if not start_date:
+        start_date = datetime.now() - timedelta(days=default_days)
+    if not end_date:
+        end_date = datetime.now()
+
+    return {
+        'start': start_date.strftime('%Y-%m-%d'),
+        'end': end_date.strftime('%Y-%m-%d')
+    }
 
 class IntervalsClient:
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.settings = get_settings()
         self.base_url = self.settings.intervals_api_url
+        self.session = _get_session()
+        self.timeout = (self.settings.intervals_connect_timeout, self.settings.intervals_timeout)
 
     def _get_headers(self):
         return {
@@ -16,64 +102,148 @@ class IntervalsClient:
         }
 
     def get_athlete_info(self) -> Dict[str, Any]:
-        response = requests.get(
+        response = self.session.get(
             f'{self.base_url}/athlete',
-            headers=self._get_headers()
+            headers=self._get_headers(),
+            timeout=self.timeout
         )
         response.raise_for_status()
         return response.json()
 
     def get_power_curve(self) -> Dict[str, Any]:
-        response = requests.get(
+        response = self.session.get(
             f'{self.base_url}/power-curve',
-            headers=self._get_headers()
+            headers=self._get_headers(),
+            timeout=self.timeout
         )
         response.raise_for_status()
         return response.json()
 
     def get_fitness_history(self, start_date: datetime = None, end_date: datetime = None) -> List[Dict[str, Any]]:
-        if not start_date:
-            start_date = datetime.now() - timedelta(days=90)
-        if not end_date:
-            end_date = datetime.now()
-
-        params = {
-            'start': start_date.strftime('%Y-%m-%d'),
-            'end': end_date.strftime('%Y-%m-%d')
-        }
-
-        response = requests.get(
+        response = self.session.get(
             f'{self.base_url}/athlete/fitness',
             headers=self._get_headers(),
-            params=params
+            params=_date_range_params(start_date, end_date, 90),
+            timeout=self.timeout
         )
         response.raise_for_status()
         return response.json()
 
     def create_workout(self, workout_data: Dict[str, Any]) -> Dict[str, Any]:
-        response = requests.post(
+        response = self.session.post(
             f'{self.base_url}/workout',
             headers=self._get_headers(),
-            json=workout_data
+            json=workout_data,
+            timeout=self.timeout
         )
         response.raise_for_status()
         return response.json()
 
     def get_workouts(self, start_date: datetime = None, end_date: datetime = None) -> List[Dict[str, Any]]:
-        if not start_date:
-            start_date = datetime.now() - timedelta(days=30)
-        if not end_date:
-            end_date = datetime.now()
-
-        params = {
-            'start': start_date.strftime('%Y-%m-%d'),
-            'end': end_date.strftime('%Y-%m-%d')
-        }
-
-        response = requests.get(
+        response = self.session.get(
             f'{self.base_url}/workouts',
             headers=self._get_headers(),
-            params=params
+            params=_date_range_params(start_date, end_date, 30),
+            timeout=self.timeout
         )
         response.raise_for_status()
         return response.json()
+
+class AsyncIntervalsClient:
+    """Variante asyncio du client intervals.icu, adossée au pool httpx du worker"""
+
+    def __init__(self, api_key: str, athlete_id: str = None):
+        self.api_key = api_key
+        self.settings = get_settings()
+        self.athlete_id = athlete_id or self.settings.intervals_athlete_id
+        self.base_url = self.settings.intervals_api_url
+        self.client = _get_async_client()
+        self.fitness_cache = _get_fitness_cache()
+        self.rate_limiter = get_rate_limiter()
+
+    def _get_headers(self):
+        return {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json'
+        }
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Envoyer une requête sous limitation de débit, en respectant les 429"""
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire(self.api_key)
+            response = await self.client.request(
+                method,
+                f'{self.base_url}{path}',
+                headers=self._get_headers(),
+                **kwargs
+            )
+            if response.status_code != 429 or attempt >= self.settings.intervals_rate_limit_retries:
+                response.raise_for_status()
+                return response
+
+            delay = self.rate_limiter.backoff_delay(attempt, response.headers.get('Retry-After'))
+            self.rate_limiter.throttle(self.api_key, delay)
+            attempt += 1
+
+    async def _get(self, path: str, params: Dict[str, Any] = None) -> Any:
+        response = await self._request('GET', path, params=params)
+        return response.json()
+
+    async def _post(self, path: str, payload: Any) -> Any:
+        response = await self._request('POST', path, json=payload)
+        return response.json()
+
+    async def _put(self, path: str, payload: Any) -> Any:
+        response = await self._request('PUT', path, json=payload)
+        return response.json()
+
+    async def _delete(self, path: str):
+        await self._request('DELETE', path)
+
+    async def get_athlete_info(self) -> Dict[str, Any]:
+        return await self._get('/athlete')
+
+    async def get_power_curve(self) -> Dict[str, Any]:
+        return await self._get('/power-curve')
+
+    async def get_fitness_history(self, start_date: datetime = None, end_date: datetime = None) -> List[Dict[str, Any]]:
+        params = _date_range_params(start_date, end_date, 90)
+        return await self.fitness_cache.get(
+            self._cache_key(),
+            date.fromisoformat(params['start']),
+            date.fromisoformat(params['end']),
+            self._fetch_fitness_history
+        )
+
+    async def _fetch_fitness_history(self, start: date, end: date) -> List[Dict[str, Any]]:
+        return await self._get('/athlete/fitness', {
+            'start': start.isoformat(),
+            'end': end.isoformat()
+        })
+
+    def _cache_key(self):
+        return (self.api_key, self.athlete_id)
+
+    def invalidate_fitness_cache(self):
+        self.fitness_cache.invalidate(self._cache_key())
+
+    async def create_workout(self, workout_data: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._post('/workout', workout_data)
+
+    async def update_workout(self, workout_id: str, workout_data: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._put(f'/workout/{workout_id}', workout_data)
+
+    async def delete_workout(self, workout_id: str):
+        await self._delete(f'/workout/{workout_id}')
+
+    async def create_workouts_bulk(self, workouts_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Créer plusieurs séances en un appel, réponses dans l'ordre d'envoi"""
+        return await self._post(f'/athlete/{self.athlete_id}/events/bulk', workouts_data)
+
+    async def get_workouts(self, start_date: datetime = None, end_date: datetime = None) -> List[Dict[str, Any]]:
+        return await self._get('/workouts', _date_range_params(start_date, end_date, 30))
+
+def get_intervals_client() -> AsyncIntervalsClient:
+    """Dépendance FastAPI : client asynchrone partageant le pool du worker"""
+    return AsyncIntervalsClient(get_settings().intervals_api_key)
@@ -1,48 +1,105 @@
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
+import numpy as np
 from ..models.goals import Race, PowerGoal
-from .intervals_client import IntervalsClient
+from .intervals_client import AsyncIntervalsClient
+from .fitness_engine import FitnessEngine, FitnessState, state_from_history, planned_daily_tss
+from .compute_executor import get_compute_executor
+from ..core.config import get_settings
 
 class MetricsAnalyzer:
-    def __init__(self, intervals_client: IntervalsClient):
+    def __init__(self, intervals_client: AsyncIntervalsClient, fitness_source=None):
         self.intervals = intervals_client
+        self.fitness = fitness_source or intervals_client
+        self.engine = FitnessEngine()
+
+    async def get_training_metrics(self, days: int = None) -> Dict[str, Any]:
+        """Récupérer l'historique de forme et les métriques du jour"""
+        days = days or get_settings().fitness_history_days
+        history = await self.fitness.get_fitness_history(datetime.now() - timedelta(days=days))
+
+        current_metrics = {'ctl': 0.0, 'atl': 0.0, 'tsb': 0.0}
+        if history:
+            last = history[-1]
+            current_metrics = {
+                'date': str(last['date'])[:10],
+                'ctl': last.get('ctl', 0),
+                'atl': last.get('atl', 0),
+                'tsb': last.get('tsb', last.get('ctl', 0) - last.get('atl', 0)),
+                'ftp': last.get('ftp')
+            }
+
+        return {
+            'current_metrics': current_metrics,
+            'history': history
+        }
+
+    async def project_training_load(self, workouts: List[Dict[str, Any]], ftp: float, end_date: datetime = None) -> Dict[str, Any]:
+        """Projeter CTL/ATL/TSB jusqu'à `end_date` à partir du dernier état connu et des séances prévues"""
+        history = await self.fitness.get_fitness_history(datetime.now() - timedelta(days=7))
+        state = state_from_history(history) or FitnessState(datetime.now().date(), 0.0, 0.0)
+
+        if end_date is None:
+            end_date = max((w['date'] for w in workouts), default=datetime.now())
+        days = max(0, (end_date.date() - state.date).days)
+
+        projection = await get_compute_executor().run_thread(self._project_plan, state, workouts, ftp, days)
+        return {
+            'start': {'date': state.date.isoformat(), 'ctl': state.ctl, 'atl': state.atl, 'tsb': state.tsb},
+            'projection': projection
+        }
+
+    def _project_plan(self, state: FitnessState, workouts: List[Dict[str, Any]], ftp: float, days: int) -> List[Dict[str, Any]]:
+        return self.engine.project(state, planned_daily_tss(workouts, ftp, state.date, days))
     
+    def project_tsb_trajectory(self, analyzed_metrics: List[Dict[str, Any]], horizon_days: int = 60, start_date: datetime = None) -> np.ndarray:
+        """TSB projeté pour chacun des `horizon_days` jours à partir de `start_date`.
+
+        Les tendances CTL/ATL sont calculées une seule fois : la trajectoire
+        est une droite évaluée en une opération sur tout l'horizon.
+        """
+        if not analyzed_metrics:
+            return np.zeros(horizon_days)
+
+        current_metrics = analyzed_metrics[-1]
+        start_date = start_date or datetime.now()
+        offset = (start_date - datetime.strptime(current_metrics['date'], '%Y-%m-%d')).days
+
+        tsb_daily_change = self._calculate_ctl_trend(analyzed_metrics) - self._calculate_atl_trend(analyzed_metrics)
+        current_tsb = current_metrics['ctl'] - current_metrics['atl']
+        return current_tsb + tsb_daily_change * (offset + np.arange(horizon_days))
+
+    def find_peak(
+        self,
+        analyzed_metrics: List[Dict[str, Any]],
+        horizon_days: int = 60,
+        start_date: datetime = None,
+        tsb_min: float = 5,
+        tsb_max: float = 15
+    ) -> Dict[str, Any]:
+        """Meilleur jour de forme sur l'horizon : TSB maximal dans la plage optimale"""
+        start_date = start_date or datetime.now()
+        trajectory = self.project_tsb_trajectory(analyzed_metrics, horizon_days, start_date)
+        in_window = np.flatnonzero((trajectory >= tsb_min) & (trajectory <= tsb_max))
+
+        if not len(in_window):
+            return {'peak_date': None, 'peak_tsb': None, 'window_days': []}
+
+        # Premier jour atteignant le maximum, comme la recherche jour par jour
+        peak = in_window[np.argmax(trajectory[in_window])]
+        return {
+            'peak_date': start_date + timedelta(days=int(peak)),
+            'peak_tsb': round(float(trajectory[peak]), 1),
+            'window_days': [start_date + timedelta(days=int(day)) for day in in_window]
+        }
+
     def _calculate_peak_date(self, analyzed_metrics: List[Dict[str, Any]]) -> Optional[datetime]:
-        # Trouver la date où le TSB sera optimal (entre 5 et 15)
-        current_date = datetime.now()
-        best_tsb = float('-inf')
-        peak_date = None
-        
-        # Simuler les 60 prochains jours
-        for days in range(60):
-            future_date = current_date + timedelta(days=days)
-            projected_tsb = self._project_tsb(analyzed_metrics, future_date)
-            
-            # Le TSB optimal est entre 5 et 15
-            if 5 <= projected_tsb <= 15:
-                if projected_tsb > best_tsb:
-                    best_tsb = projected_tsb
-                    peak_date = future_date
-        
-        return peak_date
-    
+        # Trouver la date où le TSB sera optimal (entre 5 et 15) sur les 60 prochains jours
+        return self.find_peak(analyzed_metrics, 60)['peak_date']
+
     def _project_tsb(self, analyzed_metrics: List[Dict[str, Any]], target_date: datetime) -> float:
         # Projeter le TSB futur basé sur les tendances actuelles
-        if not analyzed_metrics:
-            return 0.0
-            
-        current_metrics = analyzed_metrics[-1]
-        days_diff = (target_date - datetime.strptime(current_metrics['date'], '%Y-%m-%d')).days
-        
-        # Utiliser les tendances récentes de CTL et ATL pour projeter
-        ctl_daily_change = self._calculate_ctl_trend(analyzed_metrics)
-        atl_daily_change = self._calculate_atl_trend(analyzed_metrics)
-        
-        projected_ctl = current_metrics['ctl'] + (ctl_daily_change * days_diff)
-        projected_atl = current_metrics['atl'] + (atl_daily_change * days_diff)
-        
-        # TSB = CTL - ATL
-        return projected_ctl - projected_atl
+        return float(self.project_tsb_trajectory(analyzed_metrics, 1, target_date)[0])
     
     def _calculate_ctl_trend(self, analyzed_metrics: List[Dict[str, Any]], days: int = 7) -> float:
         # Calculer la tendance CTL sur les derniers jours
@@ -64,88 +121,93 @@ class MetricsAnalyzer:
 
     def analyze_race_preparation(self, race: Race, current_metrics: Dict[str, Any]) -> Dict[str, Any]:
         """Analyser la préparation pour une course spécifique"""
-        days_to_race = (race.date - datetime.now()).days
+        return self.analyze_races_preparation([race], current_metrics)[0]
+
+    def analyze_races_preparation(self, races: List[Race], current_metrics: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Analyser la préparation de plusieurs courses à partir des mêmes métriques.
+
+        CTL cibles, plans de TSS hebdomadaires et scores de préparation sont
+        calculés sur des tableaux couvrant toutes les courses.
+        """
+        if not races:
+            return []
+
+        now = datetime.now()
         current_ctl = current_metrics['ctl']
-        current_atl = current_metrics['atl']
-        
-        # Calculer les objectifs de préparation
-        target_ctl = self._calculate_target_ctl(race)
-        weekly_tss_targets = self._generate_weekly_tss_plan(current_ctl, target_ctl, days_to_race)
-        
-        return {
-            'days_to_race': days_to_race,
-            'fitness_gap': target_ctl - current_ctl,
-            'weekly_tss_targets': weekly_tss_targets,
-            'readiness_score': self._calculate_readiness_score(race, current_metrics),
-            'recommendations': self._generate_preparation_recommendations(race, current_metrics)
-        }
+        days_to_race = np.array([(race.date - now).days for race in races])
+        target_ctl = self._calculate_target_ctls(
+            np.array([race.distance for race in races], dtype=np.float64),
+            np.array([race.elevation for race in races], dtype=np.float64)
+        )
+        weekly_tss_targets = self._generate_weekly_tss_plans(current_ctl, target_ctl, days_to_race)
+        readiness_scores = self._calculate_readiness_scores(target_ctl, current_metrics)
+
+        return [
+            {
+                'days_to_race': int(days_to_race[i]),
+                'fitness_gap': float(target_ctl[i] - current_ctl),
+                'weekly_tss_targets': weekly_tss_targets[i],
+                'readiness_score': int(readiness_scores[i]),
+                'recommendations': self._generate_preparation_recommendations(race, current_metrics, float(target_ctl[i]))
+            }
+            for i, race in enumerate(races)
+        ]
+
+    def _calculate_target_ctls(self, distances: np.ndarray, elevations: np.ndarray) -> np.ndarray:
+        """CTL cibles de plusieurs courses : CTL de base d'une course courte, augmenté avec la distance et le dénivelé"""
+        return 80 + (distances / 100 * 10) + (elevations / 1000 * 5)
+
+    def _generate_weekly_tss_plans(self, current_ctl: float, target_ctl: np.ndarray, days_available: np.ndarray) -> List[List[Dict[str, Any]]]:
+        """Plans de TSS hebdomadaires de plusieurs courses, calculés en un seul tableau"""
+        weeks_available = np.maximum(days_available // 7, 0)
+        total_weeks = int(weeks_available.sum())
+        if not total_weeks:
+            return [[] for _ in range(len(target_ctl))]
+
+        safe_weeks = np.maximum(weeks_available, 1)
+        weekly_increase = (target_ctl - current_ctl) / safe_weeks
+
+        # Toutes les semaines de toutes les courses à la suite : (course, numéro de semaine)
+        race_index = np.repeat(np.arange(len(target_ctl)), weeks_available)
+        starts = np.cumsum(weeks_available) - weeks_available
+        week_number = np.arange(total_weeks) - starts[race_index] + 1
+
+        week_ctl = np.round(current_ctl + weekly_increase[race_index] * week_number, 1)
+        week_tss = np.round((current_ctl + weekly_increase[race_index] * week_number) * 7)  # Approximation simplifiée
+
+        plans = []
+        for i, weeks in enumerate(weeks_available):
+            first = starts[i]
+            plans.append([
+                {'week': int(week_number[j]), 'target_ctl': float(week_ctl[j]), 'weekly_tss': int(week_tss[j])}
+                for j in range(first, first + weeks)
+            ])
+        return plans
+
+    def _calculate_readiness_scores(self, target_ctl: np.ndarray, current_metrics: Dict[str, Any]) -> np.ndarray:
+        """Scores de préparation sur 100 de plusieurs courses : CTL 40 %, TSB 30 %, volume 30 %"""
+        ctl_score = np.minimum(100, current_metrics['ctl'] / target_ctl * 100)
+
+        # Le TSB et le volume ne dépendent pas de la course
+        tsb = current_metrics['tsb']
+        tsb_score = 100 if 5 <= tsb <= 15 else max(0, 100 - abs(tsb - 10) * 5)
+        volume_score = 80  # Temporaire (TODO : comparer au volume d'entraînement requis)
+
+        return np.round(0.4 * ctl_score + 0.3 * tsb_score + 0.3 * volume_score)
     
     def _calculate_target_ctl(self, race: Race) -> float:
         """Calculer le CTL cible basé sur le profil de la course"""
-        # Formule basée sur la distance et le dénivelé
-        base_ctl = 80  # CTL de base pour une course courte
-        distance_factor = race.distance / 100  # Augmenter le CTL requis avec la distance
-        elevation_factor = race.elevation / 1000  # Augmenter avec le dénivelé
-        
-        return base_ctl + (distance_factor * 10) + (elevation_factor * 5)
-    
-    def _generate_weekly_tss_plan(self, current_ctl: float, target_ctl: float, days_available: int) -> List[Dict[str, Any]]:
-        """Générer un plan de TSS hebdomadaire pour atteindre le CTL cible"""
-        weeks_available = days_available // 7
-        if weeks_available < 1:
-            return []
-        
-        ctl_increase_needed = target_ctl - current_ctl
-        weekly_increase = ctl_increase_needed / weeks_available
-        
-        weekly_plan = []
-        current_week_ctl = current_ctl
-        
-        for week in range(weeks_available):
-            target_week_ctl = current_week_ctl + weekly_increase
-            weekly_tss = target_week_ctl * 7  # Approximation simplifiée
-            
-            weekly_plan.append({
-                'week': week + 1,
-                'target_ctl': round(target_week_ctl, 1),
-                'weekly_tss': round(weekly_tss)
-            })
-            
-            current_week_ctl = target_week_ctl
-        
-        return weekly_plan
-    
-    def _calculate_readiness_score(self, race: Race, current_metrics: Dict[str, Any]) -> int:
-        """Calculer un score de préparation sur 100"""
-        # Facteurs de pondération
-        ctl_weight = 0.4
-        tsb_weight = 0.3
-        volume_weight = 0.3
-        
-        # Score CTL
-        target_ctl = self._calculate_target_ctl(race)
-        ctl_score = min(100, (current_metrics['ctl'] / target_ctl) * 100)
-        
-        # Score TSB
-        tsb = current_metrics['tsb']
-        tsb_score = 100 if 5 <= tsb <= 15 else max(0, 100 - abs(tsb - 10) * 5)
-        
-        # Score volume
-        # TODO: Implémenter la comparaison avec le volume d'entraînement requis
-        volume_score = 80  # Temporaire
-        
-        final_score = (
-            ctl_weight * ctl_score +
-            tsb_weight * tsb_score +
-            volume_weight * volume_score
+        target_ctls = self._calculate_target_ctls(
+            np.array([race.distance], dtype=np.float64),
+            np.array([race.elevation], dtype=np.float64)
         )
-        
-        return round(final_score)
-    
-    def _generate_preparation_recommendations(self, race: Race, current_metrics: Dict[str, Any]) -> List[str]:
+        return float(target_ctls[0])
+
+    def _generate_preparation_recommendations(self, race: Race, current_metrics: Dict[str, Any], target_ctl: float = None) -> List[str]:
         """Générer des recommandations spécifiques pour la préparation"""
         recommendations = []
-        target_ctl = self._calculate_target_ctl(race)
+        if target_ctl is None:
+            target_ctl = self._calculate_target_ctl(race)
         
         # Analyse CTL
         if current_metrics['ctl'] < target_ctl * 0.8:
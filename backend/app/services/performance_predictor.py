@@ -1,73 +1,109 @@
-from typing import List, Dict, Any
-from datetime import datetime, timedelta
+import hashlib
+import json
+from collections import OrderedDict
+from typing import List, Dict, Any, NamedTuple, Sequence
+from datetime import date, datetime, timedelta
 import numpy as np
-from sklearn.linear_model import LinearRegression
-from .intervals_client import IntervalsClient
+from .intervals_client import AsyncIntervalsClient
+from .linear_fit import LinearFit, fit_line
+from .compute_executor import get_compute_executor
+
+class FittedHistory(NamedTuple):
+    """Modèle ajusté sur une version de l'historique, réutilisable pour tout horizon"""
+    ftp_model: LinearFit  # x = jours depuis le dernier jour de l'historique
+    last_date: date
+    current: Dict[str, float]
+    trends: Dict[str, str]
+
+# Modèles ajustés par empreinte de l'historique (les plus récents en fin)
+_model_cache: 'OrderedDict[str, FittedHistory]' = OrderedDict()
+MODEL_CACHE_SIZE = 128
 
 class PerformancePredictor:
-    def __init__(self, intervals_client: IntervalsClient):
+    def __init__(self, intervals_client: AsyncIntervalsClient, fitness_source=None):
         self.intervals = intervals_client
+        self.fitness = fitness_source or intervals_client
 
-    def predict_performance(self, days_ahead: int = 30) -> Dict[str, Any]:
+    async def predict_performance(self, days_ahead: int = 30) -> Dict[str, Any]:
         """Prédire les performances futures basées sur l'historique"""
-        history = self.intervals.get_fitness_history()
+        prediction = await self.predict_horizons([days_ahead])
+        predictions = prediction.pop('predictions')
+        if not predictions:
+            return prediction
+
+        horizon = predictions[0]
+        return {
+            'current_ftp': prediction['current_ftp'],
+            'predicted_ftp': horizon['predicted_ftp'],
+            'predicted_ftp_interval': horizon['predicted_ftp_interval'],
+            'confidence': prediction['confidence'],
+            'predicted_date': horizon['predicted_date'],
+            'recommendations': horizon['recommendations'],
+            'metrics_trends': prediction['metrics_trends']
+        }
+
+    async def predict_horizons(self, horizons: Sequence[int]) -> Dict[str, Any]:
+        """Prédire le FTP à plusieurs horizons (en jours) avec un seul ajustement"""
+        history = await self.fitness.get_fitness_history()
         
         if not history:
             return {
                 'ftp_prediction': None,
                 'confidence': 0,
-                'recommendations': []
+                'recommendations': [],
+                'predictions': []
             }
 
-        # Préparer les données
-        dates = []
-        ftps = []
-        ctls = []
-        atls = []
-        tsbs = []
-
-        for entry in history:
-            date = datetime.fromisoformat(entry['date'])
-            dates.append((date - datetime.now()).days)
-            ftps.append(entry.get('ftp', 0))
-            ctls.append(entry.get('ctl', 0))
-            atls.append(entry.get('atl', 0))
-            tsbs.append(entry.get('tsb', 0))
-
-        # Prédiction FTP
-        X = np.array(dates).reshape(-1, 1)
-        y = np.array(ftps)
-        model = LinearRegression()
-        model.fit(X, y)
-
-        future_date = np.array([[days_ahead]])
-        predicted_ftp = model.predict(future_date)[0]
-
-        # Calcul du niveau de confiance
-        confidence = self._calculate_confidence(model.score(X, y), len(dates))
-
-        # Générer recommandations
-        recommendations = self._generate_recommendations(
-            current_ftp=ftps[-1],
-            predicted_ftp=predicted_ftp,
-            current_ctl=ctls[-1],
-            current_atl=atls[-1],
-            current_tsb=tsbs[-1]
-        )
+        fitted = await self._fit(history)
+        model = fitted.ftp_model
+        current = fitted.current
 
-        return {
-            'current_ftp': ftps[-1],
-            'predicted_ftp': round(predicted_ftp),
-            'confidence': confidence,
-            'predicted_date': (datetime.now() + timedelta(days=days_ahead)).strftime('%Y-%m-%d'),
-            'recommendations': recommendations,
-            'metrics_trends': {
-                'ctl_trend': self._calculate_trend(ctls),
-                'atl_trend': self._calculate_trend(atls),
-                'tsb_trend': self._calculate_trend(tsbs)
+        # Horizons comptés depuis aujourd'hui, modèle indexé depuis le dernier jour connu
+        horizons = np.asarray(horizons, dtype=np.int64)
+        x = horizons + (date.today() - fitted.last_date).days
+        predicted = model.predict(x)
+        low, high = model.prediction_interval(x)
+
+        today = datetime.now()
+        predictions = [
+            {
+                'days_ahead': int(horizons[i]),
+                'predicted_ftp': round(float(predicted[i])),
+                'predicted_ftp_interval': [round(float(low[i])), round(float(high[i]))],
+                'predicted_date': (today + timedelta(days=int(horizons[i]))).strftime('%Y-%m-%d'),
+                'recommendations': self._generate_recommendations(
+                    current_ftp=current['ftp'],
+                    predicted_ftp=float(predicted[i]),
+                    current_ctl=current['ctl'],
+                    current_atl=current['atl'],
+                    current_tsb=current['tsb']
+                )
             }
+            for i in range(len(horizons))
+        ]
+
+        return {
+            'current_ftp': current['ftp'],
+            'confidence': self._calculate_confidence(model.r2, model.n),
+            'predictions': predictions,
+            'metrics_trends': fitted.trends
         }
 
+    async def _fit(self, history: List[Dict[str, Any]]) -> FittedHistory:
+        """Modèle de l'historique, ajusté une seule fois par contenu d'historique"""
+        key = _history_hash(history)
+        fitted = _model_cache.get(key)
+        if fitted is not None:
+            _model_cache.move_to_end(key)
+            return fitted
+
+        # Ajustement en forme fermée (~0,5 ms) : un thread suffit, le pool de processus coûterait plus cher
+        fitted = await get_compute_executor().run_thread(fit_history, history)
+        _model_cache[key] = fitted
+        if len(_model_cache) > MODEL_CACHE_SIZE:
+            _model_cache.popitem(last=False)
+        return fitted
+
     def _generate_recommendations(
         self,
         current_ftp: float,
@@ -135,45 +171,43 @@ class PerformancePredictor:
 
         return round(confidence, 1)
 
-    def _calculate_trend(self, values: List[float], window: int = 7) -> str:
-        if len(values) < window:
-            return 'stable'
-
-        recent_values = values[-window:]
-        slope = np.polyfit(range(len(recent_values)), recent_values, 1)[0]
-
-        if slope > 0.5:
-            return 'increasing'
-        elif slope < -0.5:
-            return 'decreasing'
-        else:
-            return 'stable'
-
-    def analyze_race_readiness(
+    async def analyze_race_readiness(
         self,
         race_date: datetime,
         target_ftp: float,
         required_ctl: float
     ) -> Dict[str, Any]:
         """Analyser l'état de préparation pour une course"""
-        # Prédire l'état de forme pour la date de la course
-        days_until_race = (race_date - datetime.now()).days
-        race_prediction = self.predict_performance(days_until_race)
+        return (await self.analyze_races_readiness([(race_date, target_ftp, required_ctl)]))[0]
 
-        # Évaluer la préparation
-        ftp_readiness = race_prediction['predicted_ftp'] / target_ftp
-        fitness_readiness = race_prediction['metrics_trends']['ctl_trend']
+    async def analyze_races_readiness(self, races: Sequence[tuple]) -> List[Dict[str, Any]]:
+        """Analyser plusieurs courses (date, FTP cible, CTL requis) avec une seule prédiction multi-horizon"""
+        if not races:
+            return []
 
-        return {
-            'predicted_ftp': race_prediction['predicted_ftp'],
-            'ftp_readiness': round(ftp_readiness * 100),
-            'fitness_trend': fitness_readiness,
-            'recommendations': self._generate_race_recommendations(
-                ftp_readiness,
-                fitness_readiness,
-                days_until_race
-            )
-        }
+        # Prédire l'état de forme pour la date de chaque course
+        now = datetime.now()
+        days_until_races = [(race_date - now).days for race_date, _, _ in races]
+        prediction = await self.predict_horizons(days_until_races)
+        fitness_readiness = prediction['metrics_trends']['ctl_trend']
+
+        analyses = []
+        for (race_date, target_ftp, required_ctl), days_until_race, race_prediction in zip(
+            races, days_until_races, prediction['predictions']
+        ):
+            # Évaluer la préparation
+            ftp_readiness = race_prediction['predicted_ftp'] / target_ftp
+            analyses.append({
+                'predicted_ftp': race_prediction['predicted_ftp'],
+                'ftp_readiness': round(ftp_readiness * 100),
+                'fitness_trend': fitness_readiness,
+                'recommendations': self._generate_race_recommendations(
+                    ftp_readiness,
+                    fitness_readiness,
+                    days_until_race
+                )
+            })
+        return analyses
 
     def _generate_race_recommendations(self,
         ftp_readiness: float,
@@ -213,3 +247,50 @@ class PerformancePredictor:
             )
 
         return recommendations
+
+def _history_hash(history: List[Dict[str, Any]]) -> str:
+    """Empreinte du contenu de l'historique : change dès qu'un jour est ajouté ou corrigé"""
+    serialized = json.dumps(history, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+def fit_history(history: List[Dict[str, Any]]) -> FittedHistory:
+    """Ajuster le modèle FTP et les tendances ; exécutable dans un processus de calcul"""
+    # Préparer les données
+    dates = []
+    ftps = []
+    ctls = []
+    atls = []
+    tsbs = []
+
+    for entry in history:
+        dates.append(date.fromisoformat(str(entry['date'])[:10]))
+        ftps.append(entry.get('ftp', 0))
+        ctls.append(entry.get('ctl', 0))
+        atls.append(entry.get('atl', 0))
+        tsbs.append(entry.get('tsb', 0))
+
+    last_date = dates[-1]
+    return FittedHistory(
+        ftp_model=fit_line([(d - last_date).days for d in dates], ftps),
+        last_date=last_date,
+        current={'ftp': ftps[-1], 'ctl': ctls[-1], 'atl': atls[-1], 'tsb': tsbs[-1]},
+        trends={
+            'ctl_trend': _calculate_trend(ctls),
+            'atl_trend': _calculate_trend(atls),
+            'tsb_trend': _calculate_trend(tsbs)
+        }
+    )
+
+def _calculate_trend(values: List[float], window: int = 7) -> str:
+    if len(values) < window:
+        return 'stable'
+
+    recent_values = values[-window:]
+    slope = fit_line(range(len(recent_values)), recent_values).slope
+
+    if slope > 0.5:
+        return 'increasing'
+    elif slope < -0.5:
+        return 'decreasing'
+    else:
+        return 'stable'
@@ -0,0 +1,309 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from ..core.config import get_settings
+from ..models.goals import Race, PowerGoal
+from ..models.plans import TrainingPlan, PlannedWorkout
+from .training_planner import TrainingPlanner, build_plan, plan_inputs
+from .availability import load_calendar, calendar_revision
+from .compute_executor import ComputeQueueFull, get_compute_executor
+from .workout_arrays import CompactPlan
+
+# Jours dont la séance dépend d'une course : spécifique (8 semaines) puis affinage
+RACE_INFLUENCE = timedelta(weeks=9)
+
+# Plans sérialisés par identifiant, valides pour une version donnée
+_plan_cache: Dict[int, Tuple[int, Dict[str, Any]]] = {}
+
+class Replan(NamedTuple):
+    """Fenêtre du plan à recalculer, avec les entrées picklables de `build_plan`"""
+    plan_id: int
+    window_start: datetime
+    window_end: datetime
+    ftp: float
+    races: List[Any]
+    calendar: List[Any]
+
+class PlanStore:
+    """Persistance versionnée du dernier plan généré par athlète.
+
+    La version est incrémentée à chaque écriture et l'empreinte des entrées
+    (courses, objectifs, révision du calendrier, FTP) est conservée ; une
+    modification qui ne peut pas être replanifiée marque le plan `stale`.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_plan(self, athlete_id: str) -> Optional[TrainingPlan]:
+        return self.db.query(TrainingPlan).filter(TrainingPlan.athlete_id == athlete_id).first()
+
+    def start_plan(self, athlete_id: str, start_date: datetime, end_date: datetime, ftp: float) -> TrainingPlan:
+        """Remplacer le plan de l'athlète par un plan vide sur la nouvelle période"""
+        plan = self.get_plan(athlete_id)
+        if plan is None:
+            plan = TrainingPlan(athlete_id=athlete_id, version=0)
+            self.db.add(plan)
+        else:
+            self.db.query(PlannedWorkout).filter(PlannedWorkout.plan_id == plan.id).delete()
+
+        plan.start_date = start_date
+        plan.end_date = end_date
+        plan.ftp = ftp
+        # Obsolète tant que `complete_plan` n'a pas réussi : un plan écrit à moitié n'est jamais servi
+        plan.stale = True
+        self._bump_version(plan)
+        self.db.flush()
+        return plan
+
+    def add_workouts(self, plan: TrainingPlan, workouts: List[Dict[str, Any]]):
+        self.db.add_all([_to_planned_workout(plan, workout) for workout in workouts])
+
+    def complete_plan(self, plan: TrainingPlan):
+        """Clore un plan écrit par paquets : la version lue en cache inclut toutes les séances"""
+        plan.stale = False
+        self._bump_version(plan)
+        self.db.commit()
+
+    def replace_window(self, plan: TrainingPlan, window_start: datetime, window_end: datetime, workouts: List[Dict[str, Any]]):
+        """Remplacer les séances du plan comprises dans la fenêtre"""
+        self.db.query(PlannedWorkout).filter(
+            PlannedWorkout.plan_id == plan.id,
+            PlannedWorkout.date >= window_start,
+            PlannedWorkout.date <= window_end
+        ).delete()
+        self.add_workouts(plan, workouts)
+        self._bump_version(plan)
+
+    def get_workouts(self, plan: TrainingPlan) -> List[Dict[str, Any]]:
+        rows = self.db.query(PlannedWorkout).filter(
+            PlannedWorkout.plan_id == plan.id
+        ).order_by(PlannedWorkout.date).all()
+        return [_to_workout(row) for row in rows]
+
+    def read_plan(self, athlete_id: str) -> Optional[Dict[str, Any]]:
+        """Plan enregistré, servi depuis le cache tant que sa version n'a pas changé ; None s'il est obsolète"""
+        plan = self.get_plan(athlete_id)
+        if plan is None or plan.stale:
+            return None
+
+        cached = _plan_cache.get(plan.id)
+        if cached and cached[0] == plan.version:
+            return cached[1]
+
+        workouts = self.get_workouts(plan)
+        payload = {
+            'id': plan.id,
+            'version': plan.version,
+            'start_date': plan.start_date,
+            'end_date': plan.end_date,
+            'ftp': plan.ftp,
+            'updated_at': plan.updated_at,
+            'workouts': workouts,
+            'load': _plan_load(workouts, plan.ftp)
+        }
+        _plan_cache[plan.id] = (plan.version, payload)
+        return payload
+
+    def invalidate(self, athlete_id: str = None):
+        """Marquer le plan comme obsolète : il sera régénéré à la prochaine lecture"""
+        self.db.query(TrainingPlan).filter(
+            TrainingPlan.athlete_id == (athlete_id or get_settings().intervals_athlete_id)
+        ).update({'stale': True})
+        self.db.commit()
+
+    def prepare_replan(self, window_start: datetime, window_end: Optional[datetime], athlete_id: str = None) -> Optional[Replan]:
+        """Entrées du recalcul des seuls jours de la fenêtre, au FTP du plan enregistré.
+
+        Sans `window_end`, la fenêtre s'étend jusqu'à la fin du plan. None
+        s'il n'y a pas de plan valide, ou si la fenêtre est hors de sa période
+        (seule l'empreinte des entrées est alors mise à jour).
+        """
+        plan = self.get_plan(athlete_id or get_settings().intervals_athlete_id)
+        if plan is None or plan.stale:
+            # Un plan obsolète sera régénéré en entier
+            return None
+        if window_end is None:
+            window_end = plan.end_date
+
+        # Les jours du plan sont alignés sur l'heure de début du plan
+        day_offset = plan.start_date - datetime.combine(plan.start_date.date(), datetime.min.time())
+        window_start = max(plan.start_date, datetime.combine(window_start.date(), datetime.min.time()) + day_offset)
+        window_end = min(plan.end_date, datetime.combine(window_end.date(), datetime.min.time()) + day_offset)
+        if window_start > window_end:
+            self._bump_version(plan)
+            self.db.commit()
+            return None
+
+        # Mêmes courses que lors de la génération complète (celles de la période du plan)
+        races = self.db.query(Race).filter(
+            Race.date >= plan.start_date,
+            Race.date <= plan.end_date
+        ).all()
+        calendar = load_calendar(self.db, window_start.date(), window_end.date())
+
+        return Replan(plan.id, window_start, window_end, plan.ftp, *plan_inputs(races, calendar))
+
+    def apply_replan(self, replan: Replan, workouts: List[Dict[str, Any]]) -> Optional[int]:
+        """Enregistrer les séances recalculées de la fenêtre, retourne leur nombre"""
+        plan = self.db.get(TrainingPlan, replan.plan_id)
+        if plan is None:
+            return None
+        self.replace_window(plan, replan.window_start, replan.window_end, workouts)
+        self.db.commit()
+        return len(workouts)
+
+    def _bump_version(self, plan: TrainingPlan):
+        plan.version = (plan.version or 0) + 1
+        # Pas d'empreinte pour un plan obsolète ou en cours d'écriture : il ne sera pas réutilisé tel quel
+        plan.inputs_hash = None if plan.stale else self.inputs_hash(plan.start_date, plan.end_date, plan.ftp)
+        plan.updated_at = datetime.utcnow()
+
+    def inputs_hash(self, start_date: datetime, end_date: datetime, ftp: float) -> str:
+        """Empreinte des entrées du plan sur la période"""
+        races = self.db.query(
+            Race.id, Race.date, Race.priority, Race.name, Race.distance, Race.elevation
+        ).filter(Race.date >= start_date, Race.date <= end_date).order_by(Race.id).all()
+        goals = self.db.query(
+            PowerGoal.id, PowerGoal.target_ftp, PowerGoal.target_date
+        ).filter(PowerGoal.target_date >= start_date, PowerGoal.target_date <= end_date).order_by(PowerGoal.id).all()
+
+        serialized = json.dumps({
+            'period': [start_date, end_date],
+            'ftp': None if ftp is None else float(ftp),  # Relu en flottant depuis la colonne
+            'races': [list(race) for race in races],
+            'goals': [list(goal) for goal in goals],
+            'calendar': calendar_revision(self.db, start_date, end_date)
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+async def replan_window(db: AsyncSession, window_start: datetime, window_end: Optional[datetime], athlete_id: str = None) -> Optional[int]:
+    """Recalculer la fenêtre du plan enregistré, la génération tournant dans le pool de processus.
+
+    Retourne le nombre de séances régénérées, None s'il n'y a rien à
+    recalculer. Si le pool est saturé, le plan est marqué obsolète et sera
+    régénéré à la prochaine lecture.
+    """
+    replan = await db.run_sync(lambda session: PlanStore(session).prepare_replan(window_start, window_end, athlete_id))
+    if replan is None:
+        return None
+
+    try:
+        workouts = await get_compute_executor().run_process(
+            build_plan, replan.races, replan.calendar, replan.window_start, replan.window_end, replan.ftp
+        )
+    except ComputeQueueFull:
+        await db.run_sync(lambda session: PlanStore(session).invalidate(athlete_id))
+        return None
+
+    return await db.run_sync(lambda session: PlanStore(session).apply_replan(replan, workouts))
+
+async def regenerate_plan(db: AsyncSession, planner: TrainingPlanner, athlete_id: str, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+    """Générer et enregistrer un plan complet sur la période, la génération tournant dans le pool de processus.
+
+    Si l'empreinte des entrées n'a pas changé depuis le dernier plan complet
+    de la même période, ce plan est conservé sans nouvelle génération.
+    """
+    current_ftp = await planner.get_current_ftp()
+
+    def reuse(session: Session) -> Optional[Dict[str, Any]]:
+        plan_store = PlanStore(session)
+        plan = plan_store.get_plan(athlete_id)
+        if (
+            plan is None or plan.inputs_hash is None
+            or (plan.start_date, plan.end_date) != (start_date, end_date)
+            or plan.inputs_hash != plan_store.inputs_hash(start_date, end_date, current_ftp)
+        ):
+            return None
+        if plan.stale:
+            plan.stale = False
+            session.commit()
+        return plan_store.read_plan(athlete_id)
+
+    reused = await db.run_sync(reuse)
+    if reused is not None:
+        return reused
+
+    def load_inputs(session: Session):
+        inputs = load_plan_inputs(session, start_date, end_date)
+        return plan_inputs(inputs['races'], inputs['calendar'])
+
+    races, calendar = await db.run_sync(load_inputs)
+    workouts = await get_compute_executor().run_process(build_plan, races, calendar, start_date, end_date, current_ftp)
+
+    def store(session: Session) -> Dict[str, Any]:
+        plan_store = PlanStore(session)
+        plan = plan_store.start_plan(athlete_id, start_date, end_date, current_ftp)
+        plan_store.add_workouts(plan, workouts)
+        plan_store.complete_plan(plan)
+        return plan_store.read_plan(athlete_id)
+
+    return await db.run_sync(store)
+
+def load_plan_inputs(db: Session, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+    """Charger courses, objectifs de puissance et calendrier de la période à planifier"""
+    races = db.query(Race).filter(
+        Race.date >= start_date,
+        Race.date <= end_date
+    ).all()
+
+    power_goals = db.query(PowerGoal).filter(
+        PowerGoal.target_date >= start_date,
+        PowerGoal.target_date <= end_date
+    ).all()
+
+    # Jours explicites et règles récurrentes, développées pour la période
+    calendar = load_calendar(db, start_date.date(), end_date.date())
+
+    return {
+        'races': races,
+        'power_goals': power_goals,
+        'calendar': calendar
+    }
+
+def race_change_window(*race_dates: Optional[datetime]) -> Optional[Tuple[datetime, datetime]]:
+    """Fenêtre du plan affectée par l'ajout, la modification ou la suppression d'une course"""
+    dates = [d for d in race_dates if d is not None]
+    if not dates:
+        return None
+    return min(dates) - RACE_INFLUENCE, max(dates)
+
+def _plan_load(workouts: List[Dict[str, Any]], ftp: float) -> Dict[str, Any]:
+    """Charge prévue du plan (durée, kJ, NP, IF, TSS), calculée en une passe vectorisée"""
+    metrics = CompactPlan.from_dicts(workouts).metrics(ftp or 0)
+    return {
+        'daily': [
+            {
+                'date': workout['date'],
+                'duration': int(metrics['duration'][i]),
+                'kj': round(float(metrics['kj'][i]), 1),
+                'np': round(float(metrics['np'][i]), 1),
+                'if': round(float(metrics['if'][i]), 3),
+                'tss': round(float(metrics['tss'][i]), 1)
+            }
+            for i, workout in enumerate(workouts)
+        ],
+        'total_duration': int(metrics['duration'].sum()),
+        'total_kj': round(float(metrics['kj'].sum()), 1),
+        'total_tss': round(float(metrics['tss'].sum()), 1)
+    }
+
+def _to_planned_workout(plan: TrainingPlan, workout: Dict[str, Any]) -> PlannedWorkout:
+    return PlannedWorkout(
+        plan_id=plan.id,
+        date=workout['date'],
+        name=workout['name'],
+        description=workout.get('description', ''),
+        intervals=workout['intervals']
+    )
+
+def _to_workout(row: PlannedWorkout) -> Dict[str, Any]:
+    return {
+        'date': row.date,
+        'name': row.name,
+        'description': row.description,
+        'intervals': row.intervals
+    }
@@ -0,0 +1,114 @@
+import asyncio
+import random
+import time
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+
+class TokenBucket:
+    """Seau à jetons : `rate` requêtes par seconde, rafales jusqu'à `capacity`.
+
+    Un 429 amont suspend le seau jusqu'à `paused_until` ; tous les appelants
+    partageant ce seau attendent alors la même échéance.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.waiting = 0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        self.waiting += 1
+        try:
+            # Le verrou garantit un service dans l'ordre d'arrivée
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    if now < self.paused_until:
+                        await asyncio.sleep(self.paused_until - now)
+                        continue
+
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+        finally:
+            self.waiting -= 1
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+class RateLimiter:
+    """Limiteur partagé du worker : un seau global et un seau par clé API"""
+
+    def __init__(self, rate: float, burst: float, global_rate: float, global_burst: float,
+                 backoff_base: float = 1.0, backoff_max: float = 60.0):
+        self.rate = rate
+        self.burst = burst
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.buckets: Dict[str, TokenBucket] = {}
+
+    def _bucket(self, key: str) -> TokenBucket:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    async def acquire(self, key: str):
+        await self._bucket(key).acquire()
+        await self.global_bucket.acquire()
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Délai avant nouvelle tentative : Retry-After s'il est fourni, sinon exponentiel avec jitter.
+
+        Dans les deux cas, le délai est borné par `backoff_max`.
+        """
+        delay = _parse_retry_after(retry_after)
+        if delay is None:
+            delay = random.uniform(0, self.backoff_base * (2 ** attempt))
+        return min(delay, self.backoff_max)
+
+    def throttle(self, key: str, delay: float):
+        """Suspendre la clé après un 429 pour ne pas relancer de rafale"""
+        self._bucket(key).pause(delay)
+
+    @property
+    def queue_depth(self) -> int:
+        return self.global_bucket.waiting + sum(b.waiting for b in self.buckets.values())
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            'queue_depth': self.queue_depth,
+            'global_waiting': self.global_bucket.waiting,
+            'keys': len(self.buckets),
+            'throttled_keys': sum(1 for b in self.buckets.values() if b.paused_until > now)
+        }
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        # Date HTTP sans fuseau exploitable : elle est exprimée en UTC
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, retry_at.timestamp() - time.time())
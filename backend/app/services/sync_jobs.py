@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.config import get_settings
+from ..db.database import AsyncSessionLocal
+from ..models.sync import SyncJob
+from .intervals_client import AsyncIntervalsClient
+from .fitness_history import FitnessHistoryMirror
+from .sync_service import SyncService
+from .plan_store import load_plan_inputs
+
+logger = logging.getLogger(__name__)
+
+class SyncJobQueue:
+    """File de synchronisations exécutées en arrière-plan par un pool de workers asyncio.
+
+    Les jobs sont persistés dans `sync_jobs`. Avec plusieurs processus,
+    chacun met en file les jobs en attente au démarrage, puis ceux dont le
+    bail a expiré, vérifiés périodiquement ; un job n'est exécuté qu'après
+    avoir été réclamé par une mise à jour conditionnelle : un seul
+    processus l'emporte. Un job `running` n'est repris que si son
+    propriétaire n'a plus donné signe de vie depuis `sync_job_lease_seconds`.
+    Le battement de cœur et l'écriture finale ne touchent le job que tant
+    que ce processus en est propriétaire : bail perdu, l'exécution s'arrête.
+    """
+
+    # Intervalle entre deux écritures de la progression (battement de cœur du bail)
+    PROGRESS_FLUSH_SECONDS = 1.0
+
+    def __init__(self, workers: int):
+        self.worker_count = workers
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.workers: List[asyncio.Task] = []
+        self.owner = f'{socket.gethostname()}:{os.getpid()}'
+        # Jobs en file ou en cours dans ce processus
+        self.queued: Set[str] = set()
+
+    async def start(self):
+        await self._enqueue_claimable()
+        self.workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+        self.workers.append(asyncio.create_task(self._reclaim_expired()))
+
+    async def _enqueue_claimable(self, expired_only: bool = False):
+        """Mettre en file les jobs réclamables qui n'y sont pas déjà"""
+        criteria = [self._claimable()]
+        if expired_only:
+            # Les jobs en attente récents sont dans la file du processus qui les a reçus
+            criteria.append(SyncJob.updated_at < self._lease_expiry())
+        async with AsyncSessionLocal() as db:
+            claimable = await db.scalars(select(SyncJob.id).where(*criteria).order_by(SyncJob.created_at))
+            for job_id in claimable:
+                self._enqueue(job_id)
+
+    async def _reclaim_expired(self):
+        """Reprendre périodiquement les jobs dont le propriétaire a disparu"""
+        interval = max(get_settings().sync_job_lease_seconds / 2, self.PROGRESS_FLUSH_SECONDS)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._enqueue_claimable(expired_only=True)
+            except Exception:
+                logger.exception("Échec de la reprise des jobs de synchronisation expirés")
+
+    def _enqueue(self, job_id: str):
+        if job_id not in self.queued:
+            self.queued.add(job_id)
+            self.queue.put_nowait(job_id)
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    async def submit(self, db: AsyncSession, athlete_id: str, start_date: datetime, end_date: datetime, prompt: str = None) -> SyncJob:
+        job = SyncJob(
+            id=str(uuid.uuid4()),
+            athlete_id=athlete_id,
+            status='pending',
+            start_date=start_date,
+            end_date=end_date,
+            prompt=prompt
+        )
+        db.add(job)
+        await db.commit()
+        self._enqueue(job.id)
+        return job
+
+    def _claimable(self):
+        """Jobs en attente, ou en cours sans progression depuis la durée du bail"""
+        return or_(
+            SyncJob.status == 'pending',
+            and_(SyncJob.status == 'running', SyncJob.updated_at < self._lease_expiry())
+        )
+
+    def _lease_expiry(self) -> datetime:
+        return datetime.utcnow() - timedelta(seconds=get_settings().sync_job_lease_seconds)
+
+    def _owned(self, job_id: str):
+        """Job en cours pour ce processus"""
+        return and_(SyncJob.id == job_id, SyncJob.owner == self.owner, SyncJob.status == 'running')
+
+    async def _claim(self, db: AsyncSession, job_id: str) -> bool:
+        """Passer le job à `running` pour ce processus, si aucun autre ne l'a réclamé"""
+        claimed = await db.execute(
+            update(SyncJob)
+            .where(SyncJob.id == job_id, self._claimable())
+            .values(status='running', owner=self.owner, progress=0, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return claimed.rowcount == 1
+
+    async def _heartbeat(self, job_id: str, progress: List[int], work: asyncio.Task):
+        """Écrire périodiquement la progression, ce qui prolonge aussi le bail du job.
+
+        Si le job n'appartient plus à ce processus (bail repris ailleurs),
+        l'exécution en cours est annulée.
+        """
+        async with AsyncSessionLocal() as db:
+            while True:
+                await asyncio.sleep(self.PROGRESS_FLUSH_SECONDS)
+                renewed = await db.execute(
+                    update(SyncJob)
+                    .where(self._owned(job_id))
+                    .values(progress=progress[0], total=progress[1], updated_at=datetime.utcnow())
+                )
+                await db.commit()
+                if renewed.rowcount == 0:
+                    logger.warning("Bail du job de synchronisation %s perdu, exécution interrompue", job_id)
+                    work.cancel()
+                    return
+
+    async def _worker(self):
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await self._run(job_id)
+            except Exception:
+                logger.exception("Échec du job de synchronisation %s", job_id)
+            finally:
+                self.queued.discard(job_id)
+                self.queue.task_done()
+
+    async def _run(self, job_id: str):
+        async with AsyncSessionLocal() as job_db:
+            if not await self._claim(job_db, job_id):
+                return
+            job = await job_db.get(SyncJob, job_id)
+
+            # Progression tenue en mémoire (séances traitées, total), écrite par le battement de cœur
+            progress = [0, job.total]
+
+            def on_progress(done: int, total: int):
+                progress[0] = done
+                progress[1] = total
+
+            work = asyncio.create_task(self._sync(job, on_progress))
+            heartbeat = asyncio.create_task(self._heartbeat(job_id, progress, work))
+            try:
+                result = await asyncio.shield(work)
+            except asyncio.CancelledError:
+                if not work.cancelled():
+                    # Arrêt du worker : l'exécution est abandonnée, le job sera repris à l'expiration du bail
+                    work.cancel()
+                    raise
+                return
+            except Exception as e:
+                outcome = {'status': 'failed', 'error': str(e)}
+            else:
+                outcome = {'status': 'completed', 'result': jsonable_encoder(result)}
+            finally:
+                heartbeat.cancel()
+                await asyncio.gather(heartbeat, return_exceptions=True)
+
+            written = await job_db.execute(
+                update(SyncJob)
+                .where(self._owned(job_id))
+                .values(**outcome, progress=progress[0], total=progress[1], updated_at=datetime.utcnow())
+            )
+            await job_db.commit()
+            if written.rowcount == 0:
+                logger.warning("Bail du job de synchronisation %s perdu, résultat non enregistré", job_id)
+
+    async def _sync(self, job: SyncJob, on_progress) -> Dict[str, Any]:
+        intervals_client = AsyncIntervalsClient(get_settings().intervals_api_key, job.athlete_id)
+        # Sessions distinctes : une AsyncSession ne se partage pas entre tâches concurrentes
+        async with AsyncSessionLocal() as db, AsyncSessionLocal() as fitness_db:
+            sync_service = SyncService(
+                intervals_client,
+                FitnessHistoryMirror(fitness_db, intervals_client),
+                db,
+                on_progress=on_progress
+            )
+            inputs = await db.run_sync(lambda session: load_plan_inputs(session, job.start_date, job.end_date))
+            return await sync_service.sync_workouts(
+                **inputs,
+                start_date=job.start_date,
+                end_date=job.end_date,
+                prompt=job.prompt
+            )
+
+_queue: Optional[SyncJobQueue] = None
+
+def get_sync_job_queue() -> SyncJobQueue:
+    global _queue
+    if _queue is None:
+        _queue = SyncJobQueue(get_settings().sync_job_workers)
+    return _queue
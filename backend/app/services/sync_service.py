@@ -1,16 +1,129 @@
-from typing import List, Dict, Any
-from datetime import datetime, timedelta
-from .intervals_client import IntervalsClient
+import asyncio
+import hashlib
+import json
+import httpx
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Any, Optional, Callable, Awaitable, AsyncIterator, NamedTuple
+from datetime import date, datetime, timedelta
+from ..core.config import get_settings
+from .intervals_client import AsyncIntervalsClient
 from .training_planner import TrainingPlanner
 from .workout_generator import WorkoutGenerator
+from .plan_store import PlanStore
 from ..models.goals import Race, PowerGoal
 from ..models.calendar import DaySettings
+from ..models.sync import SyncLedgerEntry
+
+class LedgerRow(NamedTuple):
+    """Copie d'une ligne du registre : reste lisible après les commits intermédiaires de la synchronisation"""
+    id: int
+    date: date
+    content_hash: str
+    intervals_id: str
+    remote_version: Optional[str]
+
+# Support de l'endpoint d'envoi groupé, détecté au premier appel
+_bulk_events_supported: Optional[bool] = None
+
+async def _batched(items: AsyncIterator[Dict[str, Any]], size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+    batch = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _empty_result() -> Dict[str, Any]:
+    return {
+        'success': 0,
+        'failed': 0,
+        'synced_workouts': [],
+        'failed_workouts': []
+    }
+
+def _merge_results(result: Dict[str, Any], batch_result: Dict[str, Any]):
+    result['synced_workouts'].extend(batch_result['synced_workouts'])
+    result['failed_workouts'].extend(batch_result['failed_workouts'])
+    result['success'] = len(result['synced_workouts'])
+    result['failed'] = len(result['failed_workouts'])
+
+def _content_hash(payload: Dict[str, Any]) -> str:
+    """Empreinte stable du contenu envoyé à intervals.icu"""
+    serialized = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+def _event_payload(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Ramener un événement intervals.icu aux champs envoyés"""
+    return {
+        'name': event.get('name'),
+        'description': event.get('description', ''),
+        'type': event.get('type'),
+        'date': str(event.get('date', ''))[:10],
+        'intervals': event.get('intervals', [])
+    }
+
+def _remote_version(event: Dict[str, Any]) -> Optional[str]:
+    """Version d'un événement tel qu'intervals.icu le renvoie : son champ `updated`,
+    sinon l'empreinte de son contenu. None si la réponse ne contient que l'identifiant.
+
+    Elle n'est comparée qu'à une version calculée de la même façon sur une
+    réponse amont : la normalisation faite par intervals.icu (type, structure
+    des intervalles, format des nombres) ne fait pas apparaître de modification.
+    """
+    if event.get('updated'):
+        return f"updated:{event['updated']}"
+    if 'intervals' not in event and 'name' not in event:
+        return None
+    return f"sha256:{_content_hash(_event_payload(event))}"
+
+def _is_modified(expected_version: Optional[str], event: Dict[str, Any]) -> bool:
+    """Événement modifié sur intervals.icu depuis notre dernier envoi ; sans version comparable, on ne conclut pas"""
+    current_version = _remote_version(event)
+    if not expected_version or not current_version:
+        return False
+    if expected_version.split(':', 1)[0] != current_version.split(':', 1)[0]:
+        return False
+    return current_version != expected_version
+
+def _parse_date(value) -> datetime:
+    """Accepter les dates déjà désérialisées depuis JSON (resync-failed)"""
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+def _is_transient(error: Exception) -> bool:
+    """Erreurs réseau et 5xx : une requête idempotente (PUT, DELETE) peut être renvoyée"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+def _is_unsent(error: Exception) -> bool:
+    """Requête jamais parvenue au serveur : une création peut être renvoyée sans risque de doublon"""
+    return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+def _is_rejected(error: Exception) -> bool:
+    """Requête refusée avant traitement (4xx) : rien n'a été créé"""
+    return isinstance(error, httpx.HTTPStatusError) and 400 <= error.response.status_code < 500
 
 class SyncService:
-    def __init__(self, intervals_client: IntervalsClient):
+    def __init__(
+        self,
+        intervals_client: AsyncIntervalsClient,
+        fitness_source=None,
+        db: AsyncSession = None,
+        on_progress: Callable[[int, int], None] = None
+    ):
         self.intervals = intervals_client
-        self.training_planner = TrainingPlanner(intervals_client)
+        # Sans session, pas de registre : chaque séance est recréée
+        self.db = db
+        # Appelé avec (traités, total) au fil de l'envoi
+        self.on_progress = on_progress
+        self._done = 0
+        self._total = 0
+        self.training_planner = TrainingPlanner(intervals_client, fitness_source)
         self.workout_generator = WorkoutGenerator()
+        self.settings = get_settings()
 
     async def sync_workouts(
         self,
@@ -21,39 +134,222 @@ class SyncService:
         end_date: datetime,
         prompt: str = None
     ) -> Dict[str, Any]:
-        # Générer le plan d'entraînement
-        training_plan = self.training_planner.generate_training_plan(
+        # Générer le plan d'entraînement au fil de l'eau
+        current_ftp = await self.training_planner.get_current_ftp()
+        training_plan = self.training_planner.stream_training_plan(
             races=races,
             power_goals=power_goals,
             calendar=calendar,
             start_date=start_date,
             end_date=end_date,
-            prompt=prompt
+            prompt=prompt,
+            current_ftp=current_ftp
         )
 
-        # Synchroniser chaque séance avec intervals.icu
-        synced_workouts = []
-        failed_workouts = []
+        # Synchroniser les séances avec intervals.icu par paquets, à mesure qu'elles sont produites
+        self._start_progress((end_date.date() - start_date.date()).days + 1)
+        if self.db is None:
+            result = _empty_result()
+            async for batch in _batched(training_plan, self.settings.sync_bulk_chunk_size):
+                _merge_results(result, await self._push_workouts(batch))
+        else:
+            # Le plan envoyé devient le plan de référence pour les replanifications incrémentales
+            plan = await self.db.run_sync(
+                lambda session: PlanStore(session).start_plan(self.intervals.athlete_id, start_date, end_date, current_ftp)
+            )
+
+            async def add_batch(batch: List[Dict[str, Any]]):
+                await self.db.run_sync(lambda session: PlanStore(session).add_workouts(plan, batch))
 
-        for workout in training_plan:
             try:
-                # Adapter le format du workout pour intervals.icu
-                intervals_workout = self._convert_to_intervals_format(workout)
-                
-                # Pousser le workout vers intervals.icu
-                response = self.intervals.create_workout(intervals_workout)
-                
-                synced_workouts.append({
-                    'date': workout['date'],
-                    'name': workout['name'],
-                    'intervals_id': response['id']
-                })
-            except Exception as e:
-                failed_workouts.append({
-                    'date': workout['date'],
-                    'name': workout['name'],
-                    'error': str(e)
-                })
+                result = await self._delta_sync(training_plan, start_date, end_date, add_batch)
+            except Exception:
+                # Les paquets déjà validés laissent le plan marqué obsolète : régénéré à la prochaine lecture
+                await self.db.rollback()
+                raise
+            await self.db.run_sync(lambda session: PlanStore(session).complete_plan(plan))
+        self._finish_progress()
+        return result
+
+    async def _delta_sync(
+        self,
+        workouts: AsyncIterator[Dict[str, Any]],
+        start_date: datetime,
+        end_date: datetime,
+        on_batch: Callable[[List[Dict[str, Any]]], Awaitable[None]] = None
+    ) -> Dict[str, Any]:
+        """Ne créer, modifier ou supprimer que les jours dont le contenu a changé depuis le dernier envoi"""
+        ledger = {
+            row.date: row
+            for row in await self._ledger_rows(
+                SyncLedgerEntry.date >= start_date.date(),
+                SyncLedgerEntry.date <= end_date.date()
+            )
+        }
+
+        result = _empty_result()
+        result.update({'created': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0})
+
+        async for batch in _batched(workouts, self.settings.sync_bulk_chunk_size):
+            if on_batch:
+                await on_batch(batch)
+            hashes = {}
+            to_create = []
+            to_update = []
+            unchanged = []
+            for workout in batch:
+                day = workout['date'].date()
+                hashes[day] = _content_hash(self._convert_to_intervals_format(workout))
+                entry = ledger.pop(day, None)
+                if entry is None:
+                    to_create.append(workout)
+                elif entry.content_hash != hashes[day]:
+                    to_update.append((workout, entry))
+                else:
+                    unchanged.append({
+                        **self._synced_entry(workout, {'id': entry.intervals_id}, 'unchanged'),
+                        'remote_version': entry.remote_version
+                    })
+            self._advance(len(unchanged))
+
+            created = await self._push_workouts(to_create)
+            updated = await self._run_bounded(to_update, self._update_one)
+
+            await self._record_created(created['synced_workouts'], hashes)
+            await self._record_updated(to_update, updated, hashes)
+            # Registre validé paquet par paquet
+            await self.db.commit()
+
+            _merge_results(result, {
+                'synced_workouts': unchanged + created['synced_workouts'] + [r for r in updated if 'intervals_id' in r],
+                'failed_workouts': created['failed_workouts'] + [r for r in updated if 'error' in r]
+            })
+            result['created'] += created['success']
+            result['updated'] += sum(1 for r in updated if 'intervals_id' in r)
+            result['unchanged'] += len(unchanged)
+
+        # Jours du registre qui ne figurent plus dans le plan
+        to_delete = list(ledger.values())
+        self._total += len(to_delete)
+        deleted = await self._run_bounded(to_delete, self._delete_one)
+        deleted_ids = [row.id for row, outcome in zip(to_delete, deleted) if 'error' not in outcome]
+        if deleted_ids:
+            await self.db.execute(delete(SyncLedgerEntry).where(SyncLedgerEntry.id.in_(deleted_ids)))
+        await self.db.commit()
+
+        _merge_results(result, {'synced_workouts': [], 'failed_workouts': [r for r in deleted if 'error' in r]})
+        result['deleted'] = sum(1 for r in deleted if 'error' not in r)
+        result['synced_workouts'].sort(key=lambda r: r['date'])
+        result['failed_workouts'].sort(key=lambda r: r['date'])
+        return result
+
+    async def _ledger_rows(self, *criteria) -> List[LedgerRow]:
+        """Lignes du registre de l'athlète, copiées en tuples (pas d'objets ORM expirés par les commits)"""
+        rows = await self.db.execute(
+            select(
+                SyncLedgerEntry.id,
+                SyncLedgerEntry.date,
+                SyncLedgerEntry.content_hash,
+                SyncLedgerEntry.intervals_id,
+                SyncLedgerEntry.remote_version
+            ).where(SyncLedgerEntry.athlete_id == self.intervals.athlete_id, *criteria)
+        )
+        return [LedgerRow(*row) for row in rows]
+
+    async def _record_created(self, synced_workouts: List[Dict[str, Any]], hashes: Dict[Any, str]):
+        """Inscrire au registre les séances nouvellement créées sur intervals.icu, en une requête"""
+        if not synced_workouts:
+            return
+        now = datetime.utcnow()
+        await self.db.execute(insert(SyncLedgerEntry), [
+            {
+                'athlete_id': self.intervals.athlete_id,
+                'date': result['date'].date(),
+                'content_hash': hashes[result['date'].date()],
+                'intervals_id': str(result['intervals_id']),
+                'remote_version': result.get('remote_version'),
+                'created_at': now,
+                'updated_at': now
+            }
+            for result in synced_workouts
+        ])
+
+    async def _record_updated(self, to_update: List[Any], outcomes: List[Dict[str, Any]], hashes: Dict[Any, str]):
+        """Mettre à jour, par identifiant et en une requête, les lignes des séances modifiées"""
+        now = datetime.utcnow()
+        changes = [
+            {
+                'id': row.id,
+                'content_hash': hashes[row.date],
+                'intervals_id': str(outcome['intervals_id']),
+                'remote_version': outcome.get('remote_version'),
+                'updated_at': now
+            }
+            for (_, row), outcome in zip(to_update, outcomes)
+            if 'intervals_id' in outcome
+        ]
+        if changes:
+            await self.db.execute(update(SyncLedgerEntry), changes)
+
+    def _start_progress(self, total: int):
+        self._done = 0
+        self._total = total
+        if self.on_progress:
+            self.on_progress(self._done, self._total)
+
+    def _finish_progress(self):
+        # Le total initial est une estimation (jours de la période)
+        self._total = self._done
+        if self.on_progress:
+            self.on_progress(self._done, self._total)
+
+    def _advance(self, count: int = 1):
+        self._done += count
+        if self.on_progress and count:
+            self.on_progress(self._done, self._total)
+
+    async def _update_one(self, item) -> Dict[str, Any]:
+        workout, entry = item
+        payload = self._convert_to_intervals_format(workout)
+        try:
+            response = await self._with_retries(lambda: self.intervals.update_workout(entry.intervals_id, payload))
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 404:
+                return self._failed_entry(workout, e)
+            # Supprimée côté intervals.icu entre-temps : la recréer
+            return await self._push_one(workout)
+        except Exception as e:
+            return self._failed_entry(workout, e)
+        return self._synced_entry(workout, {**response, 'id': response.get('id', entry.intervals_id)}, 'updated')
+
+    async def _delete_one(self, entry: LedgerRow) -> Dict[str, Any]:
+        result = {
+            'date': datetime.combine(entry.date, datetime.min.time()),
+            'intervals_id': entry.intervals_id
+        }
+        try:
+            await self._with_retries(lambda: self.intervals.delete_workout(entry.intervals_id))
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 404:
+                return {**result, 'name': None, 'action': 'delete', 'error': str(e)}
+        except Exception as e:
+            return {**result, 'name': None, 'action': 'delete', 'error': str(e)}
+        return {**result, 'action': 'deleted'}
+
+    async def _push_workouts(self, workouts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Envoyer les séances (en lot si possible, sinon en parallèle borné) en conservant l'ordre"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(workouts)
+        pending = list(range(len(workouts)))
+
+        if self.settings.intervals_bulk_events and _bulk_events_supported is not False:
+            pending = await self._push_bulk(workouts, results)
+
+        pushed = await self._run_bounded([workouts[index] for index in pending], self._push_one)
+        for index, result in zip(pending, pushed):
+            results[index] = result
+
+        synced_workouts = [r for r in results if 'intervals_id' in r]
+        failed_workouts = [r for r in results if 'error' in r]
 
         return {
             'success': len(synced_workouts),
@@ -62,13 +358,135 @@ class SyncService:
             'failed_workouts': failed_workouts
         }
 
+    async def _push_bulk(self, workouts: List[Dict[str, Any]], results: List[Optional[Dict[str, Any]]]) -> List[int]:
+        """Envoyer les séances par paquets, retourne les index à renvoyer unitairement.
+
+        Seul un paquet refusé avant traitement (4xx, ou jamais envoyé) est
+        renvoyé séance par séance. Après une réponse incomplète, un délai
+        dépassé ou une 5xx, le serveur a pu créer tout ou partie du paquet :
+        les séances sont rapprochées des événements de la période, et celles
+        introuvables sont marquées en échec plutôt que recréées.
+        """
+        global _bulk_events_supported
+        chunk_size = self.settings.sync_bulk_chunk_size
+        remaining = []
+
+        for offset in range(0, len(workouts), chunk_size):
+            indexes = list(range(offset, min(offset + chunk_size, len(workouts))))
+            if _bulk_events_supported is False:
+                remaining.extend(indexes)
+                continue
+
+            chunk = [workouts[i] for i in indexes]
+            try:
+                payload = [self._convert_to_intervals_format(workout) for workout in chunk]
+                responses = await self.intervals.create_workouts_bulk(payload)
+                _bulk_events_supported = True
+            except Exception as e:
+                if _is_rejected(e) or _is_unsent(e):
+                    if _is_rejected(e) and e.response.status_code in (404, 405):
+                        _bulk_events_supported = False
+                    remaining.extend(indexes)
+                    continue
+                chunk_results = await self._reconcile_created(chunk, e)
+            else:
+                if isinstance(responses, list) and len(responses) == len(indexes):
+                    chunk_results = [self._synced_entry(workout, response) for workout, response in zip(chunk, responses)]
+                else:
+                    chunk_results = await self._reconcile_created(chunk, ValueError("Réponse groupée incomplète"))
+
+            for index, result in zip(indexes, chunk_results):
+                results[index] = result
+            self._advance(len(indexes))
+
+        return remaining
+
+    async def _reconcile_created(self, workouts: List[Dict[str, Any]], error: Exception) -> List[Dict[str, Any]]:
+        """Après une création à l'issue incertaine, retrouver les séances créées (même date, même nom)"""
+        days = [_parse_date(workout['date']) for workout in workouts]
+        try:
+            events = await self._with_retries(lambda: self.intervals.get_workouts(min(days), max(days)))
+        except Exception as e:
+            return [self._failed_entry(workout, e) for workout in workouts]
+
+        index = {(str(event.get('date', ''))[:10], event.get('name')): event for event in events if 'id' in event}
+        results = []
+        for workout, day in zip(workouts, days):
+            event = index.get((day.strftime('%Y-%m-%d'), workout['name']))
+            if event is None:
+                results.append(self._failed_entry(workout, error))
+            else:
+                results.append(self._synced_entry(workout, event))
+        return results
+
+    async def _run_bounded(self, items: List[Any], operation) -> List[Dict[str, Any]]:
+        """Appliquer `operation` à chaque élément avec au plus `sync_max_in_flight` appels en cours"""
+        semaphore = asyncio.Semaphore(self.settings.sync_max_in_flight)
+
+        async def run(item):
+            async with semaphore:
+                result = await operation(item)
+            self._advance()
+            return result
+
+        return await asyncio.gather(*(run(item) for item in items))
+
+    async def _with_retries(self, call, retryable: Callable[[Exception], bool] = _is_transient):
+        """Relancer `call` sur les erreurs `retryable`, avec attente exponentielle"""
+        attempt = 0
+        while True:
+            try:
+                return await call()
+            except Exception as e:
+                if attempt >= self.settings.sync_max_retries or not retryable(e):
+                    raise
+                await asyncio.sleep(self.settings.sync_retry_backoff * (2 ** attempt))
+                attempt += 1
+
+    async def _push_one(self, workout: Dict[str, Any]) -> Dict[str, Any]:
+        """Envoyer une séance ; la création n'est renvoyée que si la requête n'a pas atteint le serveur"""
+        try:
+            # Adapter le format du workout pour intervals.icu
+            intervals_workout = self._convert_to_intervals_format(workout)
+
+            # Pousser le workout vers intervals.icu
+            response = await self._with_retries(
+                lambda: self.intervals.create_workout(intervals_workout),
+                retryable=_is_unsent
+            )
+            return self._synced_entry(workout, response)
+        except Exception as e:
+            if _is_rejected(e) or _is_unsent(e):
+                return self._failed_entry(workout, e)
+            # Délai dépassé ou 5xx : la séance a peut-être été créée
+            return (await self._reconcile_created([workout], e))[0]
+
+    def _synced_entry(self, workout: Dict[str, Any], response: Dict[str, Any], action: str = 'created') -> Dict[str, Any]:
+        return {
+            'date': workout['date'],
+            'name': workout['name'],
+            'intervals_id': response['id'],
+            'remote_version': _remote_version(response),
+            'action': action
+        }
+
+    def _failed_entry(self, workout: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+        # La séance complète est conservée pour pouvoir la renvoyer via resync-failed
+        return {
+            'date': workout['date'],
+            'name': workout['name'],
+            'description': workout.get('description', ''),
+            'intervals': workout.get('intervals', []),
+            'error': str(error)
+        }
+
     def _convert_to_intervals_format(self, workout: Dict[str, Any]) -> Dict[str, Any]:
         """Convertir le format de workout interne vers le format intervals.icu"""
         return {
             'name': workout['name'],
             'description': workout.get('description', ''),
             'type': self._determine_workout_type(workout),
-            'date': workout['date'].strftime('%Y-%m-%d'),
+            'date': _parse_date(workout['date']).strftime('%Y-%m-%d'),
             'intervals': self._convert_intervals(workout['intervals'])
         }
 
@@ -121,50 +539,139 @@ class SyncService:
         return converted
 
     async def check_sync_status(self, synced_workouts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Vérifier le statut de synchronisation des workouts"""
-        status = []
+        """Vérifier le statut de synchronisation des workouts.
 
+        Les événements de la plage couverte sont récupérés en un seul appel
+        puis indexés par identifiant : chaque séance est `synced`, `missing`
+        (supprimée sur intervals.icu) ou `modified` (version amont différente
+        de celle renvoyée lors de notre dernier envoi).
+        """
+        ledger = await self._ledger_by_intervals_id(synced_workouts)
+        checks = []
         for workout in synced_workouts:
-            try:
-                # Vérifier si le workout existe toujours sur intervals.icu
-                response = await self.intervals.get_workout(workout['intervals_id'])
-                status.append({
-                    **workout,
-                    'status': 'synced',
-                    'last_check': datetime.now()
-                })
-            except Exception as e:
-                status.append({
-                    **workout,
-                    'status': 'error',
-                    'error': str(e),
-                    'last_check': datetime.now()
-                })
+            entry = ledger.get(str(workout['intervals_id']))
+            day = _parse_date(workout['date']).date() if workout.get('date') else (entry.date if entry else None)
+            expected_version = workout.get('remote_version') or (entry.remote_version if entry else None)
+            checks.append((workout, day, expected_version))
+
+        days = [day for _, day, _ in checks if day is not None]
+        last_check = datetime.now()
+        if not days:
+            return [
+                {**workout, 'status': 'error', 'error': "Date de la séance inconnue", 'last_check': last_check}
+                for workout, _, _ in checks
+            ]
+
+        try:
+            events = await self.intervals.get_workouts(
+                datetime.combine(min(days), datetime.min.time()),
+                datetime.combine(max(days), datetime.min.time())
+            )
+        except Exception as e:
+            return [
+                {**workout, 'status': 'error', 'error': str(e), 'last_check': last_check}
+                for workout, _, _ in checks
+            ]
+
+        index = {str(event['id']): event for event in events if 'id' in event}
+
+        status = []
+        for workout, day, expected_version in checks:
+            if day is None:
+                status.append({**workout, 'status': 'error', 'error': "Date de la séance inconnue", 'last_check': last_check})
+                continue
+
+            event = index.get(str(workout['intervals_id']))
+            if event is None:
+                state = 'missing'
+            elif _is_modified(expected_version, event):
+                state = 'modified'
+            else:
+                state = 'synced'
+            status.append({**workout, 'status': state, 'last_check': last_check})
 
         return status
 
+    async def _ledger_by_intervals_id(self, workouts: List[Dict[str, Any]]) -> Dict[str, LedgerRow]:
+        if self.db is None:
+            return {}
+        ids = [str(workout['intervals_id']) for workout in workouts]
+        return {row.intervals_id: row for row in await self._ledger_rows(SyncLedgerEntry.intervals_id.in_(ids))}
+
+    async def ledger_workouts(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
+        """Séances inscrites au registre sur la période, au format de `synced_workouts`"""
+        rows = await self._ledger_rows(
+            SyncLedgerEntry.date >= start_date.date(),
+            SyncLedgerEntry.date <= end_date.date()
+        )
+        return [
+            {
+                'date': datetime.combine(row.date, datetime.min.time()),
+                'intervals_id': row.intervals_id,
+                'content_hash': row.content_hash,
+                'remote_version': row.remote_version
+            }
+            for row in sorted(rows, key=lambda row: row.date)
+        ]
+
     async def resync_failed_workouts(self, failed_workouts: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Retenter la synchronisation des workouts échoués"""
-        newly_synced = []
-        still_failed = []
+        """Retenter la synchronisation des workouts échoués.
 
-        for workout in failed_workouts:
-            try:
-                intervals_workout = self._convert_to_intervals_format(workout)
-                response = await self.intervals.create_workout(intervals_workout)
-                newly_synced.append({
-                    'date': workout['date'],
-                    'name': workout['name'],
-                    'intervals_id': response['id']
-                })
-            except Exception as e:
-                still_failed.append({
-                    'date': workout['date'],
-                    'name': workout['name'],
-                    'error': str(e)
-                })
+        Un jour déjà inscrit au registre (modification en échec) est mis à
+        jour sur l'événement existant ; seuls les autres jours sont créés.
+        Les suppressions en échec (`action: 'delete'`) sont retentées.
+        """
+        entries = [{**workout, 'date': _parse_date(workout['date'])} for workout in failed_workouts]
+        deletions = [entry for entry in entries if entry.get('action') == 'delete']
+        workouts = [entry for entry in entries if entry.get('action') != 'delete']
+        self._start_progress(len(entries))
+
+        if self.db is None:
+            result = await self._push_workouts(workouts)
+            deleted = await self._run_bounded(
+                [LedgerRow(None, entry['date'].date(), None, str(entry['intervals_id']), None) for entry in deletions],
+                self._delete_one
+            )
+            return {
+                'newly_synced': result['synced_workouts'] + [r for r in deleted if 'error' not in r],
+                'still_failed': result['failed_workouts'] + [r for r in deleted if 'error' in r]
+            }
 
+        deleted = await self._retry_deletions(deletions)
+
+        hashes = {
+            workout['date'].date(): _content_hash(self._convert_to_intervals_format(workout))
+            for workout in workouts
+        }
+        ledger = {row.date: row for row in await self._ledger_rows(SyncLedgerEntry.date.in_(list(hashes)))}
+        to_update = [(workout, ledger[workout['date'].date()]) for workout in workouts if workout['date'].date() in ledger]
+        to_create = [workout for workout in workouts if workout['date'].date() not in ledger]
+
+        created = await self._push_workouts(to_create)
+        updated = await self._run_bounded(to_update, self._update_one)
+
+        await self._record_created(created['synced_workouts'], hashes)
+        await self._record_updated(to_update, updated, hashes)
+        await self.db.commit()
+
+        newly_synced = created['synced_workouts'] + [r for r in updated if 'intervals_id' in r] + [r for r in deleted if 'error' not in r]
+        still_failed = created['failed_workouts'] + [r for r in updated if 'error' in r] + [r for r in deleted if 'error' in r]
         return {
-            'newly_synced': newly_synced,
-            'still_failed': still_failed
+            'newly_synced': sorted(newly_synced, key=lambda r: r['date']),
+            'still_failed': sorted(still_failed, key=lambda r: r['date'])
         }
+
+    async def _retry_deletions(self, deletions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Retenter les suppressions en échec et retirer du registre les jours supprimés"""
+        if not deletions:
+            return []
+        ledger = await self._ledger_by_intervals_id(deletions)
+        rows = [
+            ledger.get(str(entry['intervals_id'])) or LedgerRow(None, entry['date'].date(), None, str(entry['intervals_id']), None)
+            for entry in deletions
+        ]
+        deleted = await self._run_bounded(rows, self._delete_one)
+        deleted_ids = [row.id for row, outcome in zip(rows, deleted) if 'error' not in outcome and row.id is not None]
+        if deleted_ids:
+            await self.db.execute(delete(SyncLedgerEntry).where(SyncLedgerEntry.id.in_(deleted_ids)))
+        return deleted
@@ -0,0 +1,117 @@
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+
+def parse_slots(time_slots: Optional[List[Dict[str, Any]]]) -> np.ndarray:
+    """Créneaux `{start, end}` en minutes depuis minuit, triés et fusionnés s'ils se touchent.
+
+    Tableau (n, 2) ; les créneaux illisibles ou vides sont ignorés.
+    """
+    intervals = []
+    for slot in time_slots or []:
+        try:
+            start = _minutes(slot['start'])
+            end = _minutes(slot['end'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if end > start:
+            intervals.append((start, end))
+    if not intervals:
+        return np.zeros((0, 2), dtype=np.int32)
+
+    intervals.sort()
+    merged = [list(intervals[0])]
+    for start, end in intervals[1:]:
+        if start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return np.array(merged, dtype=np.int32)
+
+def slot_error(start: Optional[str], end: Optional[str]) -> Optional[str]:
+    """Erreur de validation d'un créneau `HH:MM`-`HH:MM`, ou None"""
+    try:
+        slot_start = datetime.strptime(start, '%H:%M').time()
+        slot_end = datetime.strptime(end, '%H:%M').time()
+    except (TypeError, ValueError):
+        return f"Créneau invalide {start}-{end} (format HH:MM attendu)"
+    if slot_start >= slot_end:
+        return f"Créneau invalide {start}-{end} (fin avant le début)"
+    return None
+
+class SlotIndex:
+    """Plus long créneau libre de chaque jour disponible, indexé par date.
+
+    Seuls les jours disponibles ayant des créneaux sont indexés. Une table
+    de maxima par plages (sparse table) répond en O(1) au plus long créneau
+    d'une plage de jours, ce qui permet de trouver chaque jour d'au moins
+    N minutes en O(log n).
+    """
+
+    def __init__(self, days: Iterable[Any]):
+        entries = []
+        for day in days:
+            if not day.available:
+                continue
+            slots = parse_slots(getattr(day, 'time_slots', None))
+            if len(slots):
+                entries.append((_as_date(day.date).toordinal(), int((slots[:, 1] - slots[:, 0]).max())))
+        entries.sort()
+
+        self.ordinals = [ordinal for ordinal, _ in entries]
+        longest = np.array([minutes for _, minutes in entries], dtype=np.int32)
+
+        # levels[k][i] = max(longest[i:i + 2^k])
+        self.levels = [longest]
+        width = 1
+        while width * 2 <= len(longest):
+            previous = self.levels[-1]
+            self.levels.append(np.maximum(previous[:-width], previous[width:]))
+            width *= 2
+
+    def longest_block(self, day: date) -> Optional[int]:
+        """Durée en minutes du plus long créneau du jour, None si le jour n'a pas de créneaux"""
+        ordinal = _as_date(day).toordinal()
+        i = bisect_left(self.ordinals, ordinal)
+        if i < len(self.ordinals) and self.ordinals[i] == ordinal:
+            return int(self.levels[0][i])
+        return None
+
+    def days_with_at_least(self, start: date, end: date, minutes: int) -> List[date]:
+        """Jours de [start, end] ayant un créneau d'au moins `minutes`, chacun trouvé en O(log n)"""
+        lo = bisect_left(self.ordinals, _as_date(start).toordinal())
+        hi = bisect_right(self.ordinals, _as_date(end).toordinal())
+        days = []
+        while lo < hi:
+            i = self._first_at_least(lo, hi, minutes)
+            if i is None:
+                break
+            days.append(date.fromordinal(self.ordinals[i]))
+            lo = i + 1
+        return days
+
+    def _range_max(self, lo: int, hi: int) -> int:
+        level = (hi - lo).bit_length() - 1
+        table = self.levels[level]
+        return int(max(table[lo], table[hi - (1 << level)]))
+
+    def _first_at_least(self, lo: int, hi: int, minutes: int) -> Optional[int]:
+        if self._range_max(lo, hi) < minutes:
+            return None
+        # Plus petite fin m telle que [lo, m] contienne un jour suffisant
+        left, right = lo, hi - 1
+        while left < right:
+            middle = (left + right) // 2
+            if self._range_max(lo, middle + 1) >= minutes:
+                right = middle
+            else:
+                left = middle + 1
+        return left
+
+def _minutes(value: str) -> int:
+    hours, minutes = value.split(':')[:2]
+    return int(hours) * 60 + int(minutes)
+
+def _as_date(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
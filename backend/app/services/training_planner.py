@@ -1,193 +1,157 @@
+from bisect import bisect_right
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
-from .intervals_client import IntervalsClient
+from itertools import islice
+from types import SimpleNamespace
+from typing import List, Dict, Any, Iterator, AsyncIterator, Optional
+from .intervals_client import AsyncIntervalsClient
+from .compute_executor import get_compute_executor
+from .time_slots import SlotIndex
+from .workout_templates import render_workout
 from ..models.goals import Race, PowerGoal
 from ..models.calendar import DaySettings
 
+# Séances générées par passage dans le thread de calcul
+STREAM_CHUNK_SIZE = 14
+
 class TrainingPlanner:
-    def __init__(self, intervals_client: IntervalsClient):
+    def __init__(self, intervals_client: AsyncIntervalsClient, fitness_source=None):
         self.intervals = intervals_client
+        self.fitness = fitness_source or intervals_client
 
-    def generate_training_plan(
+    async def stream_training_plan(
         self,
         races: List[Race],
         power_goals: List[PowerGoal],
         calendar: List[DaySettings],
         start_date: datetime,
         end_date: datetime,
-        prompt: str = None
-    ) -> List[Dict[str, Any]]:
+        prompt: str = None,
+        current_ftp: float = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Produire les séances au fil de l'eau, sans matérialiser le plan complet.
+
+        Le générateur avance par paquets de `STREAM_CHUNK_SIZE` séances dans
+        un thread de calcul : la boucle asyncio reste libre pendant la génération.
+        """
+        if current_ftp is None:
+            current_ftp = await self.get_current_ftp()
+        workouts = self.iter_training_plan(*plan_inputs(races, calendar), start_date, end_date, current_ftp)
+        executor = get_compute_executor()
+        while True:
+            chunk = await executor.run_thread(lambda: list(islice(workouts, STREAM_CHUNK_SIZE)))
+            if not chunk:
+                return
+            for workout in chunk:
+                yield workout
+
+    async def get_current_ftp(self) -> float:
         # Récupérer les données de fitness actuelles
-        fitness_data = self.intervals.get_fitness_history()
-        current_ftp = fitness_data[-1].get('ftp', 200)  # FTP par défaut si non disponible
+        fitness_data = await self.fitness.get_fitness_history()
+        return fitness_data[-1].get('ftp', 200)  # FTP par défaut si non disponible
+
+    def build_training_plan(
+        self,
+        races: List[Race],
+        calendar: List[DaySettings],
+        start_date: datetime,
+        end_date: datetime,
+        current_ftp: float
+    ) -> List[Dict[str, Any]]:
+        return list(self.iter_training_plan(races, calendar, start_date, end_date, current_ftp))
+
+    def iter_training_plan(
+        self,
+        races: List[Race],
+        calendar: List[DaySettings],
+        start_date: datetime,
+        end_date: datetime,
+        current_ftp: float
+    ) -> Iterator[Dict[str, Any]]:
+        """Générer le plan jour par jour, en temps linéaire sur la période"""
+        # Index date -> paramètres du jour (la première entrée d'une date l'emporte)
+        calendar_index = {}
+        for day in calendar:
+            calendar_index.setdefault(day.date.date(), day)
+
+        # Plus long créneau libre de chaque jour, créneaux lus une seule fois
+        slot_index = SlotIndex(calendar_index.values())
 
         # Trier les courses par date et priorité
         sorted_races = sorted(races, key=lambda x: (x.date, x.priority))
+        race_dates = [race.date for race in sorted_races]
 
         # Générer le plan d'entraînement
-        training_plan = []
         current_date = start_date
 
         while current_date <= end_date:
             # Vérifier si le jour est disponible
-            day_setting = next((d for d in calendar if d.date.date() == current_date.date()), None)
+            day_setting = calendar_index.get(current_date.date())
             if not day_setting or not day_setting.available:
                 current_date += timedelta(days=1)
                 continue
 
-            # Trouver la prochaine course
-            next_race = next((r for r in sorted_races if r.date > current_date), None)
+            # Durée maximale de la séance ; pas de contrainte si le jour n'a pas de créneaux
+            longest_block = slot_index.longest_block(current_date.date())
+            max_duration = longest_block * 60 if longest_block is not None else None
+
+            # Trouver la prochaine course (première course strictement après ce jour)
+            race_index = bisect_right(race_dates, current_date)
+            next_race = sorted_races[race_index] if race_index < len(sorted_races) else None
 
             # Déterminer le type d'entraînement en fonction des objectifs
             if next_race:
                 weeks_to_race = (next_race.date - current_date).days // 7
                 if weeks_to_race <= 2:
                     # Affinage pour la course
-                    workout = self._generate_taper_workout(current_ftp, next_race)
+                    workout = self._generate_taper_workout(current_ftp, next_race, max_duration)
                 elif weeks_to_race <= 8:
                     # Entraînement spécifique pour la course
-                    workout = self._generate_race_specific_workout(current_ftp, next_race)
+                    workout = self._generate_race_specific_workout(current_ftp, next_race, max_duration)
                 else:
                     # Entraînement de base
-                    workout = self._generate_base_workout(current_ftp)
+                    workout = self._generate_base_workout(current_ftp, max_duration)
             else:
                 # Entraînement général d'amélioration
-                workout = self._generate_base_workout(current_ftp)
+                workout = self._generate_base_workout(current_ftp, max_duration)
 
-            training_plan.append(workout)
-            current_date += timedelta(days=1)
+            if workout is None and max_duration is not None:
+                # Créneau trop court pour la séance prévue : récupération raccourcie
+                workout = render_workout('recovery', current_ftp, max_duration)
+            if workout is None:
+                current_date += timedelta(days=1)
+                continue
 
-        return training_plan
+            workout['date'] = current_date
+            yield workout
+            current_date += timedelta(days=1)
 
-    def _generate_base_workout(self, ftp: float) -> Dict[str, Any]:
+    def _generate_base_workout(self, ftp: float, max_duration: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """Génère un entraînement de base pour l'amélioration générale"""
-        # Exemple simple - à personnaliser selon les besoins
-        return {
-            "name": "Entraînement de base",
-            "description": "Séance d'amélioration générale",
-            "intervals": [
-                {
-                    "name": "Warm-up",
-                    "duration": 900,  # 15 minutes
-                    "power": ftp * 0.6
-                },
-                {
-                    "name": "Main Set",
-                    "repeat": 4,
-                    "intervals": [
-                        {
-                            "duration": 480,  # 8 minutes
-                            "power": ftp * 0.88
-                        },
-                        {
-                            "duration": 120,  # 2 minutes
-                            "power": ftp * 0.5
-                        }
-                    ]
-                },
-                {
-                    "name": "Cool-down",
-                    "duration": 600,  # 10 minutes
-                    "power": ftp * 0.55
-                }
-            ]
-        }
-
-    def _generate_race_specific_workout(self, ftp: float, race: Race) -> Dict[str, Any]:
+        return render_workout('base', ftp, max_duration)
+
+    def _generate_race_specific_workout(self, ftp: float, race: Race, max_duration: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """Génère un entraînement spécifique pour une course"""
         # Adapter l'entraînement en fonction du profil de la course
         if race.elevation > 2000:  # Course avec beaucoup de dénivelé
-            return {
-                "name": "Entraînement spécifique montagne",
-                "description": f"Préparation pour {race.name}",
-                "intervals": [
-                    {
-                        "name": "Warm-up",
-                        "duration": 900,
-                        "power": ftp * 0.6
-                    },
-                    {
-                        "name": "Main Set",
-                        "repeat": 3,
-                        "intervals": [
-                            {
-                                "duration": 1200,  # 20 minutes
-                                "power": ftp * 0.92
-                            },
-                            {
-                                "duration": 300,  # 5 minutes
-                                "power": ftp * 0.5
-                            }
-                        ]
-                    },
-                    {
-                        "name": "Cool-down",
-                        "duration": 600,
-                        "power": ftp * 0.55
-                    }
-                ]
-            }
+            return render_workout('race_mountain', ftp, max_duration, race_name=race.name)
         else:  # Course plate
-            return {
-                "name": "Entraînement spécifique plat",
-                "description": f"Préparation pour {race.name}",
-                "intervals": [
-                    {
-                        "name": "Warm-up",
-                        "duration": 900,
-                        "power": ftp * 0.6
-                    },
-                    {
-                        "name": "Main Set",
-                        "repeat": 5,
-                        "intervals": [
-                            {
-                                "duration": 300,  # 5 minutes
-                                "power": ftp * 1.05
-                            },
-                            {
-                                "duration": 180,  # 3 minutes
-                                "power": ftp * 0.5
-                            }
-                        ]
-                    },
-                    {
-                        "name": "Cool-down",
-                        "duration": 600,
-                        "power": ftp * 0.55
-                    }
-                ]
-            }
-
-    def _generate_taper_workout(self, ftp: float, race: Race) -> Dict[str, Any]:
+            return render_workout('race_flat', ftp, max_duration, race_name=race.name)
+
+    def _generate_taper_workout(self, ftp: float, race: Race, max_duration: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """Génère un entraînement d'affinage avant une course"""
-        return {
-            "name": "Affinage pré-course",
-            "description": f"Affinage pour {race.name}",
-            "intervals": [
-                {
-                    "name": "Warm-up",
-                    "duration": 900,
-                    "power": ftp * 0.6
-                },
-                {
-                    "name": "Main Set",
-                    "repeat": 4,
-                    "intervals": [
-                        {
-                            "duration": 120,  # 2 minutes
-                            "power": ftp * 1.1
-                        },
-                        {
-                            "duration": 240,  # 4 minutes
-                            "power": ftp * 0.5
-                        }
-                    ]
-                },
-                {
-                    "name": "Cool-down",
-                    "duration": 600,
-                    "power": ftp * 0.55
-                }
-            ]
-        }
+        return render_workout('taper', ftp, max_duration, race_name=race.name)
+
+# Attributs lus par la génération du plan
+RACE_FIELDS = ('date', 'priority', 'name', 'elevation', 'distance')
+CALENDAR_FIELDS = ('date', 'available', 'time_slots')
+
+def plan_inputs(races: List[Race], calendar: List[DaySettings]):
+    """Copies simples (picklables) des courses et du calendrier, détachées de la session"""
+    return (
+        [SimpleNamespace(**{field: getattr(race, field) for field in RACE_FIELDS}) for race in races],
+        [SimpleNamespace(**{field: getattr(day, field) for field in CALENDAR_FIELDS}) for day in calendar]
+    )
+
+def build_plan(races, calendar, start_date: datetime, end_date: datetime, current_ftp: float) -> List[Dict[str, Any]]:
+    """Point d'entrée exécutable dans un processus de calcul"""
+    return TrainingPlanner(None).build_training_plan(races, calendar, start_date, end_date, current_ftp)
@@ -0,0 +1,174 @@
+from typing import List, Dict, Any, Optional, Tuple, Union
+import numpy as np
+
+# Segment élémentaire d'une séance. `count` est le nombre d'exécutions du
+# segment (produit des répétitions englobantes) : les blocs répétés sont
+# encodés par longueur de plage plutôt que dépliés.
+SEGMENT_DTYPE = np.dtype([
+    ('duration', np.float64),  # Secondes, fractionnaires comprises
+    ('start_power', np.float64),
+    ('end_power', np.float64),
+    ('count', np.int32),
+    ('kind', np.int8)
+])
+
+STEADY = 0
+RAMP = 1
+NO_POWER = 2  # Intervalle sans clé de puissance
+
+# Arbre des intervalles : index de segment, ou (répétitions, nom, enfants, extras) pour un bloc
+Node = Union[int, Tuple[int, Optional[str], Tuple['Node', ...], Optional[Dict[str, Any]]]]
+
+class CompactWorkout:
+    """Séance sous forme de tableau de segments, convertible sans perte vers le format dict.
+
+    Les clés que le tableau ne représente pas (cadence, puissance ou durée
+    de type différent...) sont conservées telles quelles dans `extras`,
+    une table annexe par segment ; seul l'ordre des clés peut changer. Les
+    durées fractionnaires restent exactes dans le tableau, et donc dans
+    les métriques.
+    """
+
+    __slots__ = ('meta', 'segments', 'names', 'extras', 'structure')
+
+    def __init__(
+        self,
+        meta: Dict[str, Any],
+        segments: np.ndarray,
+        names: Tuple[Optional[str], ...],
+        extras: Tuple[Optional[Dict[str, Any]], ...],
+        structure: Tuple[Node, ...]
+    ):
+        self.meta = meta
+        self.segments = segments
+        self.names = names
+        self.extras = extras
+        self.structure = structure
+
+    @classmethod
+    def from_dict(cls, workout: Dict[str, Any]) -> 'CompactWorkout':
+        rows = []
+        names = []
+        extras = []
+
+        def encode(intervals: List[Dict[str, Any]], multiplier: int) -> Tuple[Node, ...]:
+            nodes = []
+            for interval in intervals:
+                if 'repeat' in interval:
+                    repeat = interval['repeat']
+                    children = encode(interval['intervals'], multiplier * repeat)
+                    block_extras = {k: v for k, v in interval.items() if k not in ('repeat', 'name', 'intervals')}
+                    nodes.append((repeat, interval.get('name'), children, block_extras or None))
+                    continue
+
+                if 'start_power' in interval and 'end_power' in interval:
+                    row = (interval['duration'], interval['start_power'], interval['end_power'], multiplier, RAMP)
+                elif 'power' in interval:
+                    row = (interval['duration'], interval['power'], interval['power'], multiplier, STEADY)
+                else:
+                    row = (interval['duration'], 0.0, 0.0, multiplier, NO_POWER)
+                decoded = _decode(row[0], row[1], row[2], row[4])
+                # Valeurs que le segment ne restitue pas à l'identique (clé inconnue, type ou valeur différents)
+                kept = {
+                    k: v for k, v in interval.items()
+                    if k != 'name' and (k not in decoded or type(decoded[k]) is not type(v) or decoded[k] != v)
+                }
+                nodes.append(len(rows))
+                rows.append(row)
+                names.append(interval.get('name'))
+                extras.append(kept or None)
+            return tuple(nodes)
+
+        structure = encode(workout['intervals'], 1)
+        meta = {key: value for key, value in workout.items() if key != 'intervals'}
+        return cls(meta, np.array(rows, dtype=SEGMENT_DTYPE), tuple(names), tuple(extras), structure)
+
+    def to_dict(self) -> Dict[str, Any]:
+        def decode(nodes: Tuple[Node, ...]) -> List[Dict[str, Any]]:
+            intervals = []
+            for node in nodes:
+                if isinstance(node, tuple):
+                    repeat, name, children, block_extras = node
+                    block = {} if name is None else {'name': name}
+                    block['repeat'] = repeat
+                    block['intervals'] = decode(children)
+                    block.update(block_extras or {})
+                    intervals.append(block)
+                    continue
+
+                interval = {} if self.names[node] is None else {'name': self.names[node]}
+                segment = self.segments[node]
+                interval.update(_decode(segment['duration'], segment['start_power'], segment['end_power'], segment['kind']))
+                interval.update(self.extras[node] or {})
+                intervals.append(interval)
+            return intervals
+
+        return {**self.meta, 'intervals': decode(self.structure)}
+
+def _decode(duration, start_power, end_power, kind) -> Dict[str, Any]:
+    """Clés d'intervalle restituées à partir d'un segment"""
+    duration = float(duration)
+    decoded = {'duration': int(duration) if duration.is_integer() else duration}
+    if kind == RAMP:
+        decoded['start_power'] = float(start_power)
+        decoded['end_power'] = float(end_power)
+    elif kind == STEADY:
+        decoded['power'] = float(start_power)
+    return decoded
+
+class CompactPlan:
+    """Segments de toutes les séances d'un plan concaténés, pour des calculs vectorisés"""
+
+    def __init__(self, workouts: List[CompactWorkout]):
+        self.workouts = workouts
+        sizes = [len(w.segments) for w in workouts]
+        self.segments = np.concatenate([w.segments for w in workouts]) if workouts else np.zeros(0, dtype=SEGMENT_DTYPE)
+        self.workout_index = np.repeat(np.arange(len(workouts)), sizes)
+
+    @classmethod
+    def from_dicts(cls, workouts: List[Dict[str, Any]]) -> 'CompactPlan':
+        return cls([CompactWorkout.from_dict(workout) for workout in workouts])
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [workout.to_dict() for workout in self.workouts]
+
+    def metrics(self, ftp: Union[float, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Durée (s), travail (kJ), NP, IF et TSS de chaque séance.
+
+        La puissance normalisée est approchée segment par segment (moyenne de
+        P⁴ sur la durée, intégrée exactement sur les rampes) : le lissage sur
+        30 s est ignoré.
+        """
+        seg = self.segments
+        n = len(self.workouts)
+        seconds = seg['duration'] * seg['count']
+        start = seg['start_power']
+        end = seg['end_power']
+        has_power = seg['kind'] != NO_POWER
+
+        mean_power = np.where(has_power, (start + end) / 2, 0.0)
+
+        # Moyenne de P⁴ sur une rampe linéaire : (e⁵ - s⁵) / (5 (e - s))
+        delta = end - start
+        is_ramp = np.abs(delta) > 1e-9
+        safe_delta = np.where(is_ramp, delta, 1.0)
+        mean_p4 = np.where(is_ramp, (end ** 5 - start ** 5) / (5 * safe_delta), start ** 4)
+        mean_p4 = np.where(has_power, mean_p4, 0.0)
+
+        duration = np.bincount(self.workout_index, weights=seconds, minlength=n)
+        work = np.bincount(self.workout_index, weights=mean_power * seconds, minlength=n) / 1000
+        p4 = np.bincount(self.workout_index, weights=mean_p4 * seconds, minlength=n)
+
+        safe_duration = np.where(duration > 0, duration, 1.0)
+        normalized_power = np.where(duration > 0, (p4 / safe_duration) ** 0.25, 0.0)
+        ftp = np.broadcast_to(np.asarray(ftp, dtype=np.float64), (n,))
+        intensity = np.divide(normalized_power, ftp, out=np.zeros(n), where=ftp > 0)
+        tss = duration / 3600 * intensity ** 2 * 100
+
+        return {
+            'duration': duration,
+            'kj': work,
+            'np': normalized_power,
+            'if': intensity,
+            'tss': tss
+        }
@@ -0,0 +1,197 @@
+from functools import lru_cache
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple, Union
+
+# Séances décrites une seule fois, en fractions de FTP ; les watts ne sont
+# calculés qu'au rendu, et mémorisés par (modèle, FTP, durée maximale).
+
+class Step(NamedTuple):
+    duration: int
+    power: float  # Fraction de FTP
+    name: Optional[str] = None
+
+class Ramp(NamedTuple):
+    duration: int
+    start_power: float
+    end_power: float
+    name: Optional[str] = None
+
+class Repeat(NamedTuple):
+    repeat: int
+    steps: Tuple['Segment', ...]
+    name: Optional[str] = None
+
+Segment = Union[Step, Ramp, Repeat]
+
+class WorkoutTemplate(NamedTuple):
+    name: str
+    description: str  # Peut contenir des champs {race_name}
+    segments: Tuple[Segment, ...]
+
+WORKOUT_TEMPLATES: Dict[str, WorkoutTemplate] = {
+    # Plan d'entraînement
+    'base': WorkoutTemplate(
+        "Entraînement de base",
+        "Séance d'amélioration générale",
+        (
+            Step(900, 0.6, "Warm-up"),  # 15 minutes
+            Repeat(4, (Step(480, 0.88), Step(120, 0.5)), "Main Set"),  # 8 min / 2 min
+            Step(600, 0.55, "Cool-down")  # 10 minutes
+        )
+    ),
+    'race_mountain': WorkoutTemplate(
+        "Entraînement spécifique montagne",
+        "Préparation pour {race_name}",
+        (
+            Step(900, 0.6, "Warm-up"),
+            Repeat(3, (Step(1200, 0.92), Step(300, 0.5)), "Main Set"),  # 20 min / 5 min
+            Step(600, 0.55, "Cool-down")
+        )
+    ),
+    'race_flat': WorkoutTemplate(
+        "Entraînement spécifique plat",
+        "Préparation pour {race_name}",
+        (
+            Step(900, 0.6, "Warm-up"),
+            Repeat(5, (Step(300, 1.05), Step(180, 0.5)), "Main Set"),  # 5 min / 3 min
+            Step(600, 0.55, "Cool-down")
+        )
+    ),
+    'taper': WorkoutTemplate(
+        "Affinage pré-course",
+        "Affinage pour {race_name}",
+        (
+            Step(900, 0.6, "Warm-up"),
+            Repeat(4, (Step(120, 1.1), Step(240, 0.5)), "Main Set"),  # 2 min / 4 min
+            Step(600, 0.55, "Cool-down")
+        )
+    ),
+
+    # Séances à la demande (WorkoutGenerator)
+    'threshold': WorkoutTemplate(
+        "Séance Seuil",
+        "Entraînement au seuil pour améliorer votre endurance",
+        (
+            Step(900, 0.6, "Warm-up"),
+            Repeat(3, (Step(1200, 0.95), Step(300, 0.55)), "Main Set"),
+            Step(600, 0.55, "Cool-down")
+        )
+    ),
+    'vo2max': WorkoutTemplate(
+        "Séance VO2max",
+        "Intervalles intensifs pour améliorer votre VO2max",
+        (
+            Step(900, 0.6, "Warm-up"),
+            Repeat(6, (Step(180, 1.15), Step(180, 0.5)), "Main Set"),  # 3 min / 3 min
+            Step(600, 0.55, "Cool-down")
+        )
+    ),
+    'sprint': WorkoutTemplate(
+        "Séance Sprint",
+        "Développement de la puissance maximale",
+        (
+            Step(1200, 0.6, "Warm-up"),  # 20 minutes
+            Repeat(8, (Step(30, 2.0), Step(270, 0.5)), "Main Set"),  # 30 s / 4:30
+            Step(600, 0.55, "Cool-down")
+        )
+    ),
+    'endurance': WorkoutTemplate(
+        "Séance Endurance",
+        "Développement de l'endurance de base",
+        (
+            Step(7200, 0.7, "Main Set"),  # 2 heures
+        )
+    ),
+    'recovery': WorkoutTemplate(
+        "Séance Récupération",
+        "Séance légère pour favoriser la récupération",
+        (
+            Step(3600, 0.5, "Recovery"),  # 1 heure
+        )
+    ),
+    'ftp_test': WorkoutTemplate(
+        "Test FTP",
+        "Test FTP de 20 minutes",
+        (
+            Step(1200, 0.6, "Warm-up"),
+            Ramp(300, 0.7, 0.9, "Ramp-up"),
+            Step(300, 0.5, "Recovery"),
+            Step(1200, 1.05, "Test"),
+            Step(600, 0.5, "Cool-down")
+        )
+    )
+}
+
+# Plus courte étape principale conservée quand une séance est raccourcie
+MIN_STEP_DURATION = 600
+
+def render_workout(template_key: str, ftp: float, max_duration: Optional[int] = None, **context) -> Optional[Dict[str, Any]]:
+    """Séance au format interne pour un FTP donné.
+
+    Avec `max_duration` (secondes), la séance est raccourcie pour tenir
+    dans le créneau ; None si elle ne peut pas l'être.
+
+    La liste `intervals` est partagée entre les séances de même modèle,
+    FTP et durée maximale : elle ne doit pas être modifiée.
+    """
+    template = WORKOUT_TEMPLATES[template_key]
+    intervals = _render_segments(template_key, ftp, max_duration)
+    if intervals is None:
+        return None
+    return {
+        "name": template.name,
+        "description": template.description.format(**context) if context else template.description,
+        "intervals": intervals
+    }
+
+@lru_cache(maxsize=1024)
+def _render_segments(template_key: str, ftp: float, max_duration: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+    segments = WORKOUT_TEMPLATES[template_key].segments
+    if max_duration is not None:
+        segments = _fit(segments, max_duration)
+        if segments is None:
+            return None
+    return _render(segments, ftp)
+
+def _duration(segments: Tuple[Segment, ...]) -> int:
+    return sum(
+        segment.repeat * _duration(segment.steps) if isinstance(segment, Repeat) else segment.duration
+        for segment in segments
+    )
+
+def _fit(segments: Tuple[Segment, ...], max_duration: int) -> Optional[Tuple[Segment, ...]]:
+    """Raccourcir la séance : moins de répétitions du bloc principal, sinon une étape principale plus courte"""
+    excess = _duration(segments) - max_duration
+    if excess <= 0:
+        return segments
+
+    for i, segment in enumerate(segments):
+        if isinstance(segment, Repeat):
+            block = _duration(segment.steps)
+            repeat = segment.repeat - -(-excess // block)  # Répétitions retirées, arrondies au-dessus
+            if repeat >= 1:
+                return segments[:i] + (segment._replace(repeat=repeat),) + segments[i + 1:]
+            return None
+
+    # Sans bloc répété : raccourcir la plus longue étape
+    i = max(range(len(segments)), key=lambda k: segments[k].duration)
+    duration = segments[i].duration - excess
+    if duration < MIN_STEP_DURATION:
+        return None
+    return segments[:i] + (segments[i]._replace(duration=duration),) + segments[i + 1:]
+
+def _render(segments: Tuple[Segment, ...], ftp: float) -> List[Dict[str, Any]]:
+    rendered = []
+    for segment in segments:
+        interval = {} if segment.name is None else {"name": segment.name}
+        if isinstance(segment, Repeat):
+            interval["repeat"] = segment.repeat
+            interval["intervals"] = _render(segment.steps, ftp)
+        elif isinstance(segment, Ramp):
+            interval["duration"] = segment.duration
+            interval["start_power"] = ftp * segment.start_power
+            interval["end_power"] = ftp * segment.end_power
+        else:
+            interval["duration"] = segment.duration
+            interval["power"] = ftp * segment.power
+        rendered.append(interval)
+    return rendered
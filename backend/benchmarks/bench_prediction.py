@@ -0,0 +1,75 @@
+"""Benchmark de la régression utilisée par PerformancePredictor.
+
+Compare scikit-learn (LinearRegression, ancien chemin) à l'ajustement en
+forme fermée de app.services.linear_fit : temps d'import mesuré dans un
+interpréteur neuf, puis latence d'une prédiction (ajustement, R², valeur
+prédite) sur un historique de 90 jours.
+
+Usage (depuis backend/) : python -m benchmarks.bench_prediction
+"""
+import subprocess
+import sys
+import time
+import numpy as np
+from app.services.linear_fit import _fit_numpy
+
+def import_time(statement: str, runs: int = 5) -> float:
+    """Meilleur temps d'exécution de `statement` dans un nouvel interpréteur, import de numpy déduit"""
+    def best(code: str) -> float:
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code], check=True)
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    return best(f'import numpy; {statement}') - best('import numpy')
+
+def make_history(days: int = 90):
+    rng = np.random.default_rng(42)
+    x = np.arange(-days, 0, dtype=np.float64)
+    y = 250 + 0.2 * x + rng.normal(0, 4, days)
+    return x, y
+
+def sklearn_predict(x, y, days_ahead):
+    from sklearn.linear_model import LinearRegression
+    model = LinearRegression()
+    model.fit(x.reshape(-1, 1), y)
+    return model.predict(np.array([[days_ahead]]))[0], model.score(x.reshape(-1, 1), y)
+
+def numpy_predict(x, y, days_ahead):
+    model = _fit_numpy(x, y)
+    model.prediction_interval(days_ahead)
+    return float(model.predict(days_ahead)), model.r2
+
+def per_call(func, *args, runs: int = 2000) -> float:
+    func(*args)
+    started = time.perf_counter()
+    for _ in range(runs):
+        func(*args)
+    return (time.perf_counter() - started) / runs
+
+def main():
+    x, y = make_history()
+    try:
+        import sklearn  # noqa: F401
+    except ImportError:
+        sklearn_available = False
+    else:
+        sklearn_available = True
+
+    print(f"{'':>10} {'import (ms)':>12} {'prédiction (µs)':>16}")
+    if sklearn_available:
+        sk_import = import_time('import sklearn.linear_model')
+        sk_call = per_call(sklearn_predict, x, y, 30)
+        print(f"{'sklearn':>10} {sk_import * 1000:>12.0f} {sk_call * 1e6:>16.0f}")
+        assert np.allclose(sklearn_predict(x, y, 30), numpy_predict(x, y, 30))
+    else:
+        print(f"{'sklearn':>10} {'non installé':>12}")
+
+    np_import = import_time('import app.services.linear_fit')
+    np_call = per_call(numpy_predict, x, y, 30)
+    print(f"{'numpy':>10} {np_import * 1000:>12.0f} {np_call * 1e6:>16.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark de la génération de plan sur de longues périodes.
+
+Compare la boucle indexée de TrainingPlanner.build_training_plan à
+l'ancienne boucle (recherche linéaire dans le calendrier et les courses
+pour chaque jour), avec un calendrier dense et une course par mois.
+
+Usage (depuis backend/) : python -m benchmarks.bench_training_planner
+"""
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from app.services.training_planner import TrainingPlanner
+
+def make_inputs(years: int, races_per_year: int = 12):
+    start = datetime(2025, 1, 1)
+    days = 365 * years
+    end = start + timedelta(days=days - 1)
+
+    calendar = [
+        SimpleNamespace(date=start + timedelta(days=i), available=(i % 7 != 0))
+        for i in range(days)
+    ]
+    races = [
+        SimpleNamespace(
+            date=start + timedelta(days=int(i * 365 / races_per_year) + 20),
+            priority='A' if i % 3 == 0 else 'B',
+            name=f'Course {i}',
+            elevation=2500 if i % 2 else 800,
+            distance=120
+        )
+        for i in range(years * races_per_year)
+    ]
+    return races, calendar, start, end
+
+def legacy_plan(planner: TrainingPlanner, races, calendar, start_date, end_date, ftp):
+    """Ancienne boucle : O(jours x calendrier + jours x courses)"""
+    sorted_races = sorted(races, key=lambda x: (x.date, x.priority))
+    plan = []
+    current_date = start_date
+    while current_date <= end_date:
+        day_setting = next((d for d in calendar if d.date.date() == current_date.date()), None)
+        if not day_setting or not day_setting.available:
+            current_date += timedelta(days=1)
+            continue
+        next_race = next((r for r in sorted_races if r.date > current_date), None)
+        if next_race:
+            weeks_to_race = (next_race.date - current_date).days // 7
+            if weeks_to_race <= 2:
+                workout = planner._generate_taper_workout(ftp, next_race)
+            elif weeks_to_race <= 8:
+                workout = planner._generate_race_specific_workout(ftp, next_race)
+            else:
+                workout = planner._generate_base_workout(ftp)
+        else:
+            workout = planner._generate_base_workout(ftp)
+        workout['date'] = current_date
+        plan.append(workout)
+        current_date += timedelta(days=1)
+    return plan
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+def main():
+    planner = TrainingPlanner(intervals_client=None)
+    ftp = 250.0
+
+    print(f"{'années':>6} {'jours':>6} {'ancien (s)':>11} {'indexé (s)':>11} {'gain':>7}")
+    for years in (1, 2, 5):
+        races, calendar, start, end = make_inputs(years)
+        legacy, legacy_time = timed(legacy_plan, planner, races, calendar, start, end, ftp)
+        indexed, indexed_time = timed(planner.build_training_plan, races, calendar, start, end, ftp)
+        assert [w['name'] for w in legacy] == [w['name'] for w in indexed]
+        print(f"{years:>6} {len(calendar):>6} {legacy_time:>11.3f} {indexed_time:>11.4f} {legacy_time / indexed_time:>6.0f}x")
+
+if __name__ == '__main__':
+    main()